@@ -0,0 +1,62 @@
+"""
+Measures the compressed transfer mode (`CrytonModel.compress_output`) over the recorded and synthetic outputs from
+`benchmarks/corpus.py`: the compression ratio, the time to compress (locally, as a stand-in for the remote host) and
+to decode, and the resulting end-to-end latency of moving the output over a session of the given bandwidth.
+
+Run from the repository root: `python benchmarks/compression.py [--bandwidth MB/s] [--recorded-only]`
+"""
+import argparse
+import base64
+import gzip
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from corpus import recorded, synthetic
+from cyst_models.cryton.transport import CompressedTransport
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bandwidth", type=float, default=1.0, help="session throughput in MB/s")
+    parser.add_argument("--recorded-only", action="store_true", help="skip the synthetic outputs")
+    args = parser.parse_args()
+
+    samples = list(recorded())
+    if not args.recorded_only:
+        samples.extend(synthetic())
+
+    transport = CompressedTransport(use_zstd=False)
+    bandwidth = args.bandwidth * 1e6
+    print(
+        f"{'sample':<28} {'raw [kB]':>10} {'wire [kB]':>10} {'ratio':>7} {'compress [ms]':>14} {'decode [ms]':>12} "
+        f"{'raw e2e [ms]':>13} {'gzip e2e [ms]':>14}"
+    )
+    for sample in samples:
+        raw = sample.output.encode()
+
+        start = time.perf_counter()
+        wire = base64.b64encode(gzip.compress(raw)).decode()
+        compress = time.perf_counter() - start
+
+        start = time.perf_counter()
+        decoded = transport.unwrap(wire)
+        decode = time.perf_counter() - start
+        if decoded != sample.output:
+            print(f"{sample.name}: decoded output differs")
+            return 1
+
+        raw_latency = len(raw) / bandwidth
+        compressed_latency = compress + len(wire) / bandwidth + decode
+        print(
+            f"{sample.name:<28} {len(raw) / 1e3:>10.1f} {len(wire) / 1e3:>10.1f} {len(raw) / len(wire):>7.2f} "
+            f"{compress * 1e3:>14.3f} {decode * 1e3:>12.3f} {raw_latency * 1e3:>13.1f} {compressed_latency * 1e3:>14.1f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Recorded and synthetic outputs of the Metasploit modules and commands used by the Cryton actions.
+
+Recorded outputs live in `benchmarks/outputs/` as `<name>.txt` together with the expected processed output in
+`<name>.json`. Synthetic outputs are generated on demand, so multi-megabyte inputs do not have to be stored.
+"""
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from netaddr import IPNetwork
+
+OUTPUTS = Path(__file__).parent / "outputs"
+
+
+@dataclass
+class Sample:
+    kind: str
+    name: str
+    output: str
+    expected: Optional[Any] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.output)
+
+
+def recorded() -> Iterator[Sample]:
+    for path in sorted(OUTPUTS.glob("*.txt")):
+        expected_path = path.with_suffix(".json")
+        expected = json.loads(expected_path.read_text()) if expected_path.exists() else None
+        yield Sample(path.stem, path.stem, path.read_text(), expected)
+
+
+def find_listing(files: int) -> Sample:
+    lines = []
+    for i in range(files):
+        lines.append(f"/usr/share/doc/package-{i // 100}/examples/file-{i}.txt")
+    return Sample("find", f"find_{files}", "\n".join(lines) + "\n")
+
+
+def ping_sweep(network: str, live_every: int = 3) -> Sample:
+    lines = ["RHOSTS => " + network, "SESSION => 1", f"[*] Performing ping sweep for IP range {network}"]
+    for i, ip in enumerate(IPNetwork(network).iter_hosts()):
+        if i % live_every == 0:
+            lines.append(f"[+] \t{ip} host found")
+    lines.append("[*] Post module execution completed")
+    return Sample("ping_sweep", f"ping_sweep_{network.replace('/', '_')}", "\n".join(lines) + "\n")
+
+
+def portscan_tcp(network: str, ports: list[int], open_every: int = 5) -> Sample:
+    lines = [f"PORTS => {','.join(str(port) for port in ports)}", f"RHOSTS => {network}", "THREADS => 10"]
+    hosts = list(IPNetwork(network).iter_hosts())
+    for i, ip in enumerate(hosts):
+        for port in ports:
+            if (i + port) % open_every == 0:
+                lines.append(f"[+] {ip}:             - {ip}:{port} - TCP OPEN")
+        if i % 256 == 0:
+            lines.append(f"[*] {network}:             - Scanned {i} of {len(hosts)} hosts ({i * 100 // len(hosts)}% complete)")
+    lines.append("[*] Auxiliary module execution completed")
+    return Sample("portscan_tcp", f"portscan_tcp_{network.replace('/', '_')}", "\n".join(lines) + "\n")
+
+
+def autoroute(networks: int) -> Sample:
+    lines = ["CMD => autoadd", "SESSION => 4", "[*] Searching for subnets to autoroute."]
+    for i in range(networks):
+        lines.append(f"[+] Route added to subnet 10.{i // 256}.{i % 256}.0/255.255.255.0 from host's routing table.")
+    lines.append("[*] Post module execution completed")
+    return Sample("autoroute", f"autoroute_{networks}", "\n".join(lines) + "\n")
+
+
+SYNTHETIC: list[Callable[[], Sample]] = [
+    lambda: find_listing(1_000),
+    lambda: find_listing(100_000),
+    lambda: find_listing(500_000),
+    lambda: ping_sweep("10.0.0.0/24"),
+    lambda: ping_sweep("10.0.0.0/16"),
+    lambda: portscan_tcp("10.0.0.0/20", [21, 22, 80, 3306]),
+    lambda: autoroute(4096),
+]
+
+
+def synthetic() -> Iterator[Sample]:
+    for generate in SYNTHETIC:
+        yield generate()
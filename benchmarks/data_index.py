@@ -0,0 +1,80 @@
+"""
+Measures the per-lookup cost of exfiltrating a file from a service with the private data index of `SimulationModel`
+vs. the scan of the service's data it replaced, from 10 to 100k data items per service. Half of the lookups hit an
+existing file, the other half probe paths that do not exist. The one-time cost of building the index is reported
+separately.
+
+Run from the repository root: `python benchmarks/data_index.py [--lookups N]`
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from cyst_models.simulation.index import PrivateDataIndex
+
+SIZES = (10, 100, 1_000, 10_000, 100_000)
+
+
+class Configuration:
+    """
+    The part of the configuration API the index uses, with the data of a single service.
+    """
+
+    def __init__(self, data: list):
+        self.service = SimpleNamespace(private_data=lambda _: data)
+
+
+def build_data(size: int) -> list:
+    return [
+        SimpleNamespace(id=f"/home/user{i % 100}/file{i}.txt", description=f"content {i}", owner="user")
+        for i in range(size)
+    ]
+
+
+def scan(data: list, file: str):
+    for item in data:
+        if item.id == file:
+            return item
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    service = object()
+    print(f"{'items':>8} {'build [ms]':>11} {'index [us]':>11} {'scan [us]':>11} {'speedup':>9}")
+    for size in SIZES:
+        data = build_data(size)
+        files = [rng.choice(data).id if i % 2 else f"/home/missing/file{i}.txt" for i in range(args.lookups)]
+
+        index = PrivateDataIndex(Configuration(data))
+        start = time.perf_counter()
+        index.get(service, files[0])
+        build = time.perf_counter() - start
+
+        for file in files[:100]:
+            if index.get(service, file) is not scan(data, file):
+                raise RuntimeError(f"Lookup of {file} differs from the scan.")
+
+        start = time.perf_counter()
+        for file in files:
+            index.get(service, file)
+        indexed = (time.perf_counter() - start) / len(files)
+
+        start = time.perf_counter()
+        for file in files:
+            scan(data, file)
+        scanned = (time.perf_counter() - start) / len(files)
+
+        print(
+            f"{size:>8} {build * 1e3:>11.2f} {indexed * 1e6:>11.2f} {scanned * 1e6:>11.2f} "
+            f"{scanned / indexed:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares the shared IPv4 extraction engine with the per-line regular expressions it replaced.
+
+Run from the repository root: `python benchmarks/extraction.py`
+"""
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from corpus import ping_sweep, portscan_tcp, autoroute
+from cyst_models.cryton.parsing import HOST_FOUND, OPEN_PORT, ROUTE_ADDED
+
+LEGACY_IPV4 = r"(((25[0-5]|(2[0-4]|1\d|[1-9]|)\d)\.?\b){4})"
+
+
+def legacy_hosts(output: str) -> list[str]:
+    ips = []
+    for line in output.split("\n"):
+        if line.endswith("host found") and (x := re.search(LEGACY_IPV4, line)):
+            ips.append(x.groups()[0])
+    return ips
+
+
+def legacy_endpoints(output: str) -> dict[str, list[int]]:
+    services: dict[str, list[int]] = dict()
+    for line in output.split("\n"):
+        if line.startswith("[+]") and (x := re.search(LEGACY_IPV4 + r":(\d+)", line)):
+            services.setdefault(x.groups()[0], list()).append(int(x.groups()[-1]))
+    return services
+
+
+def legacy_subnets(output: str) -> list[str]:
+    subnets = []
+    for line in output.split("\n"):
+        if line.startswith("[+]") and (x := re.search(r"(((25[0-5]|(2[0-4]|1\d|[1-9]|)\d)\.?\b){4}/[\d.]+)", line)):
+            subnets.append(x.groups()[0])
+    return subnets
+
+
+CASES = [
+    (ping_sweep("10.0.0.0/16"), legacy_hosts, HOST_FOUND.addresses),
+    (portscan_tcp("10.0.0.0/16", [21, 22, 80, 3306]), legacy_endpoints, OPEN_PORT.endpoints),
+    (autoroute(4096), legacy_subnets, ROUTE_ADDED.subnets),
+]
+
+
+def main() -> None:
+    print(f"{'sample':<28} {'size [kB]':>10} {'legacy [ms]':>12} {'engine [ms]':>12} {'speedup':>8}")
+    for sample, legacy, engine in CASES:
+        legacy_time = min(timeit.repeat(lambda: legacy(sample.output), number=1, repeat=5)) * 1e3
+        engine_time = min(timeit.repeat(lambda: engine(sample.output), number=1, repeat=5)) * 1e3
+        print(
+            f"{sample.name:<28} {sample.size / 1e3:>10.1f} {legacy_time:>12.2f} {engine_time:>12.2f} "
+            f"{legacy_time / engine_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
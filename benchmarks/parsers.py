@@ -0,0 +1,78 @@
+"""
+Measures latency, throughput and peak memory of the `processed_output` of the Cryton actions over the recorded and
+synthetic outputs from `benchmarks/corpus.py`. Recorded outputs are also checked against their expected results.
+
+Run from the repository root: `python benchmarks/parsers.py [--recorded-only] [--repeat N]`
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from corpus import Sample, recorded, synthetic
+from cyst_models.cryton.actions import *
+
+ACTIONS = {
+    "find": lambda: FindData(1, "attacker_node.attacker", None, 1, "/"),
+    "ping_sweep": lambda: ScanNetwork(1, "attacker_node.attacker", None, "10.0.0.0/16", 1),
+    "portscan_tcp": lambda: FindServices(1, "attacker_node.attacker", None, "10.0.0.0/16", "22"),
+    "autoroute": lambda: UpdateRouting(1, "attacker_node.attacker", None, 1),
+    "ssh_login": lambda: ExploitServer(1, "attacker_node.attacker", None, "10.0.1.2", "ssh"),
+}
+
+
+def measure(sample: Sample, repeat: int) -> tuple[float, float, int, object]:
+    action = ACTIONS[sample.kind]()
+    action.report = {"output": sample.output, "serialized_output": {}, "state": "FINISHED"}
+
+    result = None
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = action.processed_output
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    action.processed_output
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latency = min(latencies)
+    return latency, sample.size / latency / 1e6, peak, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recorded-only", action="store_true", help="skip the synthetic outputs")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed runs per sample")
+    args = parser.parse_args()
+
+    samples = list(recorded())
+    if not args.recorded_only:
+        samples.extend(synthetic())
+
+    failures = 0
+    print(f"{'sample':<28} {'size [kB]':>10} {'latency [ms]':>13} {'MB/s':>8} {'peak [kB]':>10}  golden")
+    for sample in samples:
+        latency, throughput, peak, result = measure(sample, args.repeat)
+        if sample.expected is None:
+            golden = "-"
+        elif result == sample.expected:
+            golden = "ok"
+        else:
+            golden = "FAIL"
+            failures += 1
+
+        print(
+            f"{sample.name:<28} {sample.size / 1e3:>10.1f} {latency * 1e3:>13.3f} {throughput:>8.1f} "
+            f"{peak / 1e3:>10.1f}  {golden}"
+        )
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""
+Compares filling precompiled step templates with deep-copying equivalent plain dictionaries.
+
+Run from the repository root: `python benchmarks/templates.py`
+"""
+import copy
+import timeit
+
+from cyst_models.cryton.actions import *
+
+ROUNDS = 20000
+
+
+def build_actions() -> list:
+    return [
+        ExecuteCommand(1, "attacker_node.attacker", None, 1, "whoami"),
+        ExfiltrateData(1, "attacker_node.attacker", None, 1, "/etc/passwd"),
+        FindData(1, "attacker_node.attacker", None, "session-step", "/home"),
+        FindServices(1, "attacker_node.attacker", None, "192.168.0.0/24", "21,22,80,3306"),
+        ScanNetwork(1, "attacker_node.attacker", None, "192.168.0.0/24", 1),
+        UpdateRouting(1, "attacker_node.attacker", None, 1),
+        UpgradeSession(1, "attacker_node.attacker", None, 1, "192.168.0.2"),
+        ExploitServer(1, "attacker_node.attacker", None, "192.168.0.3", "mysql"),
+    ]
+
+
+def main() -> None:
+    print(f"{'action':<16} {'deepcopy [us]':>14} {'compiled [us]':>14} {'speedup':>8}")
+    for action in build_actions():
+        plain = action.template
+        compiled = action._template
+
+        deepcopy_time = timeit.timeit(lambda: copy.deepcopy(plain), number=ROUNDS) / ROUNDS * 1e6
+        compiled_time = timeit.timeit(compiled.render, number=ROUNDS) / ROUNDS * 1e6
+        print(
+            f"{type(action).__name__:<16} {deepcopy_time:>14.2f} {compiled_time:>14.2f} "
+            f"{deepcopy_time / compiled_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,4 +5,5 @@ from cyst_models.cryton.actions.find_services import FindServices
 from cyst_models.cryton.actions.exploit_server import ExploitServer
 from cyst_models.cryton.actions.find_data import FindData
 from cyst_models.cryton.actions.execute_command import ExecuteCommand
-from cyst_models.cryton.actions.exfiltrate_data import ExfiltrateData
+from cyst_models.cryton.actions.exfiltrate_data import ExfiltrateData, ExfiltrateChunk, FileDigest
+from cyst_models.cryton.actions.staging import StagePrerequisite, Prerequisite
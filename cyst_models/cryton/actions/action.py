@@ -1,24 +1,108 @@
+import asyncio
 import copy
+import functools
 from abc import ABC
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, Hashable
 from datetime import datetime
 
 from cyst.api.environment.external import ExternalResources
 
+from cyst_models.cryton import metrics
+from cyst_models.cryton.actions.template import BoundTemplate
+from cyst_models.cryton.transport import CompressedTransport
+
+# Properties turning the output into results, their time is attributed to the parse phase
+_PARSING_PROPERTIES = ("processed_output", "addresses", "endpoints", "subnets")
+
+
+def _normalize(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple((key, _normalize(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    return value
+
 
 class Action(ABC):
+    # Idempotent actions have no side effects on the target, so identical concurrent ones can share one execution
+    idempotent: bool = False
+    # Scheduling class of the action, recon actions are heavy and can wait for exploitation steps on a busy worker
+    priority: str = "default"
+
     def __init__(
         self,
         message_id: int,
-        template: dict,
+        template: Union[dict, BoundTemplate],
         caller_id: str,
         external_resources: ExternalResources,
+        transport: Optional[CompressedTransport] = None,
     ):
         self._message_id = message_id
         self._template = template
         self._caller_id = caller_id
         self._external_resources = external_resources
+        self._transport = transport
         self._report: Optional[dict] = None
+        self._decoded: Optional[tuple[str, str]] = None
+        self._submitted = asyncio.Event()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in _PARSING_PROPERTIES:
+            if isinstance(prop := cls.__dict__.get(name), property):
+                setattr(cls, name, property(cls._timed_parse(prop.fget)))
+
+    @staticmethod
+    def _timed_parse(getter):
+        @functools.wraps(getter)
+        def wrapper(self):
+            with metrics.measure("parse"):
+                return getter(self)
+
+        return wrapper
+
+    @property
+    def template(self) -> dict:
+        """
+        A fresh copy of the Cryton template. Precompiled templates are filled, plain dictionaries are deep-copied.
+        Commands are wrapped for the transport, if there is one.
+        """
+        if isinstance(self._template, BoundTemplate):
+            template = self._template.render()
+        else:
+            template = copy.deepcopy(self._template)
+
+        if self._transport:
+            for step in template.values():
+                if "command" in step["arguments"]:
+                    step["arguments"]["command"] = self._transport.wrap(step["arguments"]["command"])
+        return template
+
+    @property
+    def submitted(self) -> asyncio.Event:
+        """
+        Set once the step is handed over for execution, which lets other steps be started after it.
+        """
+        return self._submitted
+
+    @property
+    def caller_id(self) -> str:
+        return self._caller_id
+
+    @property
+    def node_id(self) -> str:
+        return self._caller_id.split(".")[0]
+
+    @property
+    def coalescing_key(self) -> Hashable:
+        """
+        Identifies what the action does regardless of the message it was created for, i.e., its node and its template
+        without the step name.
+        """
+        encoded = self._transport is not None
+        if isinstance(self._template, BoundTemplate):
+            return self.node_id, encoded, self._template.step_template, tuple(sorted(self._template.values.items()))
+        return self.node_id, encoded, _normalize(list(self._template.values()))
 
     @property
     def report(self) -> dict:
@@ -26,9 +110,45 @@ class Action(ABC):
             raise RuntimeError(self._message_id, "Cannot retrieve output before the action finishes.")
         return self._report
 
+    @report.setter
+    def report(self, value: dict) -> None:
+        self._report = value
+
+    def fail(self, reason: str) -> None:
+        """
+        Stores a failed report for an action that could not be executed in Cryton at all.
+        """
+        self._report = {"output": reason, "serialized_output": {}, "state": "ERROR"}
+
+    def merge_report(self, other: "Action", keep_state: bool = False) -> None:
+        """
+        Merges the report of a step that ran alongside this one, so that a single response covers both. Outputs are
+        concatenated, serialized outputs of this step take precedence, and the merged step spans both steps' times.
+        A failure of the other step fails the merged one, unless `keep_state` is set because only this step decides
+        the outcome, e.g., a handler catching the session of an exploit trigger.
+        """
+        report, other_report = dict(self.report), other.report
+        report["output"] = "\n".join(output for output in (other_report["output"], report["output"]) if output)
+        if isinstance(report["serialized_output"], dict) and isinstance(other_report["serialized_output"], dict):
+            report["serialized_output"] = {**other_report["serialized_output"], **report["serialized_output"]}
+        if not keep_state and not other.is_success():
+            report["state"] = other_report["state"]
+        if other.cryton_time is not None and self.cryton_time is not None:
+            report["start_time"] = min(report["start_time"], other_report["start_time"])
+            report["finish_time"] = max(report["finish_time"], other_report["finish_time"])
+        self._report = report
+
     @property
     def output(self) -> str:
-        return self.report["output"]
+        output = self.report["output"]
+        if self._transport is None:
+            return output
+
+        # Decoded once per report
+        if self._decoded is None or self._decoded[0] is not output:
+            with metrics.measure("parse"):
+                self._decoded = (output, self._transport.unwrap(output))
+        return self._decoded[1]
 
     @property
     def serialized_output(self) -> Union[dict, list]:
@@ -51,21 +171,45 @@ class Action(ABC):
         return out
 
     @property
-    def execution_time(self) -> int:
-        start_time = datetime.strptime(self.report["start_time"], "%Y-%m-%dT%H:%M:%S.%fZ")
-        finish_time = datetime.strptime(self.report["finish_time"], "%Y-%m-%dT%H:%M:%S.%fZ")
+    def cryton_time(self) -> Optional[float]:
+        """
+        Wall time of the step in Cryton in seconds with microsecond resolution, None if the report has no timestamps.
+        """
+        report = self.report
+        if not report.get("start_time") or not report.get("finish_time"):
+            return None
 
-        return int((finish_time - start_time).total_seconds())
+        start_time = datetime.fromisoformat(report["start_time"])
+        finish_time = datetime.fromisoformat(report["finish_time"])
+        return (finish_time - start_time).total_seconds()
+
+    @property
+    def execution_time(self) -> int:
+        """
+        Wall time of the step in Cryton in milliseconds.
+        """
+        return round((self.cryton_time or 0) * 1000)
 
     async def execute(self) -> None:
         """
         Runs Cryton action in the correct context using resource.
         :return: None
         """
-        self._report = await self._external_resources.fetch_async(
+        self._report = await self.fetch_report()
+
+    async def fetch_report(self) -> dict:
+        """
+        Runs Cryton action in the correct context using resource without storing the report.
+        :return: Report of the Cryton step
+        """
+        with metrics.measure("template"):
+            template = self.template
+
+        self._submitted.set()
+        return await self._external_resources.fetch_async(
             "cryton://",
             {
-                "template": copy.deepcopy(self._template),
-                "node_id": self._caller_id.split(".")[0],
+                "template": template,
+                "node_id": self.node_id,
             },
         )
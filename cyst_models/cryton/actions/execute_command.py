@@ -1,32 +1,88 @@
+import re
+import uuid
+from typing import Any, Optional, Sequence
+
 from cyst_models.cryton.actions.action import Action, ExternalResources
+from cyst_models.cryton.actions.template import StepTemplate, SESSION, COMMAND
+from cyst_models.cryton.transport import CompressedTransport
 
 
 class ExecuteCommand(Action):
+    step = StepTemplate(
+        "execute-command-{message_id}",
+        {
+            "module": "command",
+            "arguments": {
+                "session_id": SESSION,
+                "command": COMMAND,
+            },
+        },
+    )
+
     def __init__(
         self,
         message_id: int,
         caller_id: str,
         external_resources: ExternalResources,
         session: str | int,
-        command: str,
+        command: str | Sequence[str],
+        transport: Optional[CompressedTransport] = None,
     ):
-        used_session = session if isinstance(session, int) else f'{{{{ {session} }}}}'
-        template = {
-            f"execute-command-{message_id}": {
-                "module": "command",
-                "arguments": {
-                    "session_id": used_session,
-                    "command": command,
-                },
-            },
-        }
-        super().__init__(message_id, template, caller_id, external_resources)
+        if isinstance(command, str):
+            self._commands = None
+            self._delimiter = None
+        else:
+            self._commands = list(command)
+            self._delimiter = f"cyst-{uuid.uuid4().hex}"
+            command = batch_command(self._commands, self._delimiter)
+        template = self.step.bind(message_id, session=session, command=command)
+        super().__init__(message_id, template, caller_id, external_resources, transport)
 
     @property
-    def processed_output(self) -> str:
-        return self.output
+    def commands(self) -> Optional[list[str]]:
+        """
+        Commands of a batch, None for a single command.
+        """
+        return self._commands
+
+    @property
+    def processed_output(self) -> str | list[dict[str, Any]]:
+        """
+        Output of the command, or a result per command of a batch with its output and exit code. Commands after one
+        that ended the shell have no exit code.
+        """
+        if self._commands is None:
+            return self.output
+        return split_batch_output(self.output, self._commands, self._delimiter)
+
+
+def batch_command(commands: Sequence[str], delimiter: str) -> str:
+    """
+    Joins the commands into one shell invocation. Each command is grouped on lines of its own, so that comments,
+    background jobs and multi-line commands stay within the group, and is followed by a line with the delimiter, its
+    index, and its exit code, preceded by a newline so that the marker starts a line even after output without one.
+    """
+    return "\n".join(
+        f"{{\n{command}\n}} 2>&1\nprintf '\\n%s %d %d\\n' {delimiter} {index} $?"
+        for index, command in enumerate(commands)
+    )
+
 
+def split_batch_output(output: str, commands: Sequence[str], delimiter: str) -> list[dict[str, Any]]:
+    results = [{"command": command, "output": "", "exit_code": None} for command in commands]
+    marker = re.compile(rf"\n{re.escape(delimiter)} (\d+) (\d+)\n?")
 
-# /usr/bin/mysqldump
+    start = 0
+    for match in marker.finditer(output):
+        index, exit_code = int(match.group(1)), int(match.group(2))
+        if index < len(results):
+            results[index]["output"] = output[start : match.start()]
+            results[index]["exit_code"] = exit_code
+        start = match.end()
 
-# {'output': '/usr/bin/mysqldump\n'}
+    # Output of a command that did not return, e.g., because it ended the session's shell
+    rest = output[start:]
+    pending = next((result for result in results if result["exit_code"] is None), None)
+    if rest and pending is not None:
+        pending["output"] = rest
+    return results
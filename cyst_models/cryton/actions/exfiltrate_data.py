@@ -1,7 +1,24 @@
+import base64
+from typing import Optional
+
 from cyst_models.cryton.actions.action import Action, ExternalResources
+from cyst_models.cryton.actions.template import StepTemplate, Format, SESSION
+from cyst_models.cryton.transport import CompressedTransport
 
 
 class ExfiltrateData(Action):
+    step = StepTemplate(
+        "exfiltrate-data-{message_id}",
+        {
+            "module": "command",
+            "arguments": {
+                "session_id": SESSION,
+                "command": Format("cat {file}"),
+                "timeout": 60,
+            },
+        },
+    )
+
     def __init__(
         self,
         message_id: int,
@@ -9,56 +26,82 @@ class ExfiltrateData(Action):
         external_resources: ExternalResources,
         session: str | int,
         file: str,
+        transport: Optional[CompressedTransport] = None,
     ):
-        used_session = session if isinstance(session, int) else f'{{{{ {session} }}}}'
-        template = {
-            f"exfiltrate-data-{message_id}": {
-                "module": "command",
-                "arguments": {
-                    "session_id": used_session,
-                    "command": f"cat {file}",
-                    "timeout": 60,
-                },
-            }
-        }
-        super().__init__(message_id, template, caller_id, external_resources)
+        template = self.step.bind(message_id, session=session, file=file)
+        super().__init__(message_id, template, caller_id, external_resources, transport)
 
     @property
     def processed_output(self) -> str:
         return self.output.removesuffix("\n")  # This is primarily for commands stored in the output
 
 
-# root:x:0:0:root:/root:/bin/bash
-# daemon:x:1:1:daemon:/usr/sbin:/usr/sbin/nologin
-# bin:x:2:2:bin:/bin:/usr/sbin/nologin
-# sys:x:3:3:sys:/dev:/usr/sbin/nologin
-# sync:x:4:65534:sync:/bin:/bin/sync
-# games:x:5:60:games:/usr/games:/usr/sbin/nologin
-# man:x:6:12:man:/var/cache/man:/usr/sbin/nologin
-# lp:x:7:7:lp:/var/spool/lpd:/usr/sbin/nologin
-# mail:x:8:8:mail:/var/mail:/usr/sbin/nologin
-# news:x:9:9:news:/var/spool/news:/usr/sbin/nologin
-# uucp:x:10:10:uucp:/var/spool/uucp:/usr/sbin/nologin
-# proxy:x:13:13:proxy:/bin:/usr/sbin/nologin
-# www-data:x:33:33:www-data:/var/www:/usr/sbin/nologin
-# backup:x:34:34:backup:/var/backups:/usr/sbin/nologin
-# list:x:38:38:Mailing List Manager:/var/list:/usr/sbin/nologin
-# irc:x:39:39:ircd:/run/ircd:/usr/sbin/nologin
-# _apt:x:42:65534::/nonexistent:/usr/sbin/nologin
-# nobody:x:65534:65534:nobody:/nonexistent:/usr/sbin/nologin
-# employee:x:1000:1000::/home/employee:/bin/bash
-# systemd-network:x:998:998:systemd Network Management:/:/usr/sbin/nologin
-# systemd-timesync:x:997:997:systemd Time Synchronization:/:/usr/sbin/nologin
-# messagebus:x:100:102::/nonexistent:/usr/sbin/nologin
-# sshd:x:101:65534::/run/sshd:/usr/sbin/nologin
-# developer:x:1001:1001::/home/developer:/bin/bash
+class FileDigest(Action):
+    step = StepTemplate(
+        "file-digest-{message_id}",
+        {
+            "module": "command",
+            "arguments": {
+                "session_id": SESSION,
+                "command": Format("wc -c < {file} && sha256sum {file}"),
+                "timeout": 60,
+            },
+        },
+    )
+
+    def __init__(
+        self,
+        message_id: int,
+        caller_id: str,
+        external_resources: ExternalResources,
+        session: str | int,
+        file: str,
+    ):
+        template = self.step.bind(message_id, session=session, file=file)
+        super().__init__(message_id, template, caller_id, external_resources)
+
+    @property
+    def processed_output(self) -> tuple[int, str]:
+        """
+        Size of the file in bytes and its SHA-256 digest.
+        """
+        lines = self.output.split()
+        if len(lines) < 2 or not lines[0].isdigit():
+            raise RuntimeError(f"Unexpected output of file digest: {self.output!r}")
+        return int(lines[0]), lines[1]
+
 
+class ExfiltrateChunk(Action):
+    step = StepTemplate(
+        "exfiltrate-chunk-{message_id}-{index}",
+        {
+            "module": "command",
+            "arguments": {
+                "session_id": SESSION,
+                "command": Format("dd if={file} bs={chunk_size} skip={index} count=1 2>/dev/null | base64 -w0"),
+                "timeout": 60,
+            },
+        },
+    )
 
-# git push
-# tail -f var/logs/error
-# nano +22,5 functions.sh
-# source project-env/bin/activate
-# history
-# mysqldump -u cdri -h wordpress_db_node --password=cdri --no-tablespaces cdri
+    def __init__(
+        self,
+        message_id: int,
+        caller_id: str,
+        external_resources: ExternalResources,
+        session: str | int,
+        file: str,
+        index: int,
+        chunk_size: int,
+    ):
+        self.index = index
+        template = self.step.bind(message_id, session=session, file=file, index=index, chunk_size=chunk_size)
+        super().__init__(message_id, template, caller_id, external_resources)
 
-# {'output': 'root:x:0:0:root:/root:/bin/bash\n'}
+    @property
+    def processed_output(self) -> bytes:
+        """
+        Content of the chunk. Characters outside of the base64 alphabet, e.g., messages of the shell mixed into the
+        output, raise `binascii.Error` instead of being skipped.
+        """
+        return base64.b64decode(self.output.strip(), validate=True)
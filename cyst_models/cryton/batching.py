@@ -0,0 +1,114 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any
+
+from cyst.api.environment.external import ExternalResources
+
+
+@dataclass
+class BatchStatistics:
+    actions: int = 0
+    round_trips: int = 0
+    batches: int = 0
+    fallbacks: int = 0
+
+    @property
+    def saved_round_trips(self) -> int:
+        return self.actions - self.round_trips
+
+
+class CrytonBatcher:
+    """
+    Merges templates of actions that are submitted for the same node within a short window into one multi-step Cryton
+    plan and routes the report of each step back to the action that submitted it.
+
+    The batcher exposes the same `fetch_async` as `ExternalResources`, so it can be handed to actions in its place.
+    A merged plan is expected to come back as a report keyed by step names. If the platform returns anything else, the
+    batch is resubmitted step by step and batching is switched off for the node. The steps may thus run twice, so only
+    idempotent actions may be handed the batcher.
+    """
+
+    def __init__(self, external_resources: ExternalResources, window: float = 0.01, max_steps: int = 16):
+        self._external_resources = external_resources
+        self._window = window
+        self._max_steps = max_steps
+        self._pending: dict[str, list[tuple[dict, asyncio.Future]]] = dict()
+        self._flush_handles: dict[str, asyncio.TimerHandle] = dict()
+        self._unsupported: set[str] = set()
+        self._statistics = BatchStatistics()
+
+    @property
+    def statistics(self) -> BatchStatistics:
+        return self._statistics
+
+    async def fetch_async(self, resource: str, data: dict) -> Any:
+        if resource != "cryton://" or len(data["template"]) != 1 or data["node_id"] in self._unsupported:
+            self._statistics.actions += 1
+            self._statistics.round_trips += 1
+            return await self._external_resources.fetch_async(resource, data)
+
+        node_id = data["node_id"]
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(node_id, [])
+        pending.append((data["template"], future))
+
+        if len(pending) >= self._max_steps:
+            self._flush(node_id)
+        elif node_id not in self._flush_handles:
+            self._flush_handles[node_id] = loop.call_later(self._window, self._flush, node_id)
+
+        return await future
+
+    def _flush(self, node_id: str) -> None:
+        if handle := self._flush_handles.pop(node_id, None):
+            handle.cancel()
+
+        batch = self._pending.pop(node_id, [])
+        if batch:
+            asyncio.ensure_future(self._submit(node_id, batch))
+
+    async def _submit(self, node_id: str, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        self._statistics.actions += len(batch)
+
+        step_names = [next(iter(template)) for template, _ in batch]
+        if len(batch) == 1 or len(set(step_names)) != len(step_names):
+            await asyncio.gather(*(self._submit_single(node_id, template, future) for template, future in batch))
+            return
+
+        template: dict = dict()
+        for step, _ in batch:
+            template.update(step)
+
+        self._statistics.round_trips += 1
+        self._statistics.batches += 1
+        try:
+            report = await self._external_resources.fetch_async("cryton://", {"template": template, "node_id": node_id})
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if not isinstance(report, dict) or not all(isinstance(report.get(name), dict) for name in step_names):
+            # Only idempotent steps are batched, so running them again one by one is safe
+            self._unsupported.add(node_id)
+            self._statistics.fallbacks += 1
+            await asyncio.gather(*(self._submit_single(node_id, step, future) for step, future in batch))
+            return
+
+        for name, (_, future) in zip(step_names, batch):
+            if not future.done():
+                future.set_result(report[name])
+
+    async def _submit_single(self, node_id: str, template: dict, future: asyncio.Future) -> None:
+        self._statistics.round_trips += 1
+        try:
+            report = await self._external_resources.fetch_async("cryton://", {"template": template, "node_id": node_id})
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        if not future.done():
+            future.set_result(report)
@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+
+@dataclass
+class CacheStatistics:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """
+    LRU cache of processed outputs of idempotent actions. Entries are keyed by action ID, caller node, and an
+    action-specific key, and expire after a per-action TTL. Actions without a TTL are never cached.
+    """
+
+    def __init__(self, ttls: dict[str, float], max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self._ttls = dict(ttls)
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, str, Hashable], tuple[float, Any]] = OrderedDict()
+        self._statistics = CacheStatistics()
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        return self._statistics
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def caches(self, action_id: str) -> bool:
+        return action_id in self._ttls
+
+    def get(self, action_id: str, node_id: str, key: Hashable) -> Optional[Any]:
+        if action_id not in self._ttls:
+            return None
+
+        entry_key = (action_id, node_id, key)
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            self._statistics.misses += 1
+            return None
+
+        expires, value = entry
+        if expires <= self._clock():
+            del self._entries[entry_key]
+            self._statistics.expirations += 1
+            self._statistics.misses += 1
+            return None
+
+        self._entries.move_to_end(entry_key)
+        self._statistics.hits += 1
+        return value
+
+    def put(self, action_id: str, node_id: str, key: Hashable, value: Any) -> None:
+        if action_id not in self._ttls:
+            return
+
+        entry_key = (action_id, node_id, key)
+        self._entries[entry_key] = (self._clock() + self._ttls[action_id], value)
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._statistics.evictions += 1
+
+    def invalidate(self, node_id: Optional[str] = None, action_id: Optional[str] = None) -> int:
+        """
+        Drops entries matching the given node and/or action. Without arguments, the whole cache is cleared.
+        :return: The number of dropped entries.
+        """
+        stale = [
+            key
+            for key in self._entries
+            if (node_id is None or key[1] == node_id) and (action_id is None or key[0] == action_id)
+        ]
+        for key in stale:
+            del self._entries[key]
+
+        self._statistics.invalidations += len(stale)
+        return len(stale)
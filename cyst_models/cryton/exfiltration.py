@@ -0,0 +1,135 @@
+import binascii
+import hashlib
+import math
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Awaitable, Callable, Optional
+
+from cyst.api.environment.external import ExternalResources
+
+from cyst_models.cryton.actions import ExfiltrateChunk, FileDigest
+from cyst_models.cryton.actions.action import Action
+from cyst_models.cryton.sharding import as_completed
+
+
+@dataclass
+class TransferProgress:
+    file: str
+    size: int = 0
+    chunks: int = 0
+    completed_chunks: int = 0
+    transferred: int = 0
+    started: float = field(default_factory=time.monotonic)
+    finished: Optional[float] = None
+    verified: Optional[bool] = None
+
+    @property
+    def fraction(self) -> float:
+        return self.transferred / self.size if self.size else 1.0
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """
+        Transferred bytes per second.
+        """
+        return self.transferred / self.elapsed if self.elapsed else 0.0
+
+
+@dataclass
+class TransferResult:
+    progress: TransferProgress
+    content: Optional[bytes] = None
+    # The action whose failure ended the transfer
+    failed: Optional[Action] = None
+    error: Optional[str] = None
+
+
+class ChunkedExfiltration:
+    """
+    Transfers a file over a session in base64-encoded byte ranges, several of them at once. Chunks are written to
+    their place in a buffer as they arrive and the reassembled content is checked against the SHA-256 digest of the
+    remote file. The whole file is held in memory, as it is returned as the content of a single response.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[Action], Awaitable[None]],
+        chunk_size: int = 1 << 20,
+        parallelism: int = 4,
+    ):
+        self._execute = execute
+        self._chunk_size = chunk_size
+        self._parallelism = parallelism
+
+    async def transfer(
+        self,
+        message_id: int,
+        caller_id: str,
+        external_resources: ExternalResources,
+        session: str | int,
+        file: str,
+        progress: Optional[TransferProgress] = None,
+    ) -> TransferResult:
+        progress = progress or TransferProgress(file)
+        result = TransferResult(progress)
+
+        digest = FileDigest(message_id, caller_id, external_resources, session, file)
+        await self._execute(digest)
+        if not digest.is_success():
+            result.failed = digest
+            return self._finish(result)
+        try:
+            progress.size, checksum = digest.processed_output
+        except RuntimeError as e:
+            result.failed, result.error = digest, str(e)
+            return self._finish(result)
+
+        progress.chunks = max(1, math.ceil(progress.size / self._chunk_size))
+        chunks = [
+            ExfiltrateChunk(message_id, caller_id, external_resources, session, file, index, self._chunk_size)
+            for index in range(progress.chunks)
+        ]
+
+        buffer = bytearray(progress.size)
+        transfers = as_completed([partial(self._executed, chunk) for chunk in chunks], self._parallelism)
+        try:
+            async for chunk in transfers:
+                if not chunk.is_success():
+                    result.failed = chunk
+                    return self._finish(result)
+                offset = chunk.index * self._chunk_size
+                try:
+                    data = chunk.processed_output
+                except (binascii.Error, ValueError) as e:
+                    result.failed, result.error = chunk, f"Chunk of {file} at offset {offset} is corrupted: {e}"
+                    return self._finish(result)
+                # A file that grew since its digest is caught by the checksum, the buffer only has to fit it
+                if offset + len(data) > len(buffer):
+                    buffer.extend(bytes(offset + len(data) - len(buffer)))
+                buffer[offset : offset + len(data)] = data
+                progress.completed_chunks += 1
+                progress.transferred += len(data)
+        finally:
+            await transfers.aclose()
+
+        progress.verified = hashlib.sha256(buffer).hexdigest() == checksum
+        if not progress.verified:
+            result.error = f"Checksum of {file} does not match, the file may have changed during the transfer."
+            return self._finish(result)
+
+        result.content = bytes(buffer)
+        return self._finish(result)
+
+    async def _executed(self, action: Action) -> Action:
+        await self._execute(action)
+        return action
+
+    @staticmethod
+    def _finish(result: TransferResult) -> TransferResult:
+        result.progress.finished = time.monotonic()
+        return result
@@ -0,0 +1,189 @@
+import asyncio
+import itertools
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from cyst.api.environment.external import ExternalResources
+
+from cyst_models.cryton.actions import ExploitServer, SessionListener
+from cyst_models.cryton.actions.action import Action
+
+
+@dataclass(frozen=True)
+class ListenerSpec:
+    """
+    A Metasploit `multi/handler`. Bind handlers connect to a port opened on the target, reverse handlers listen on a
+    port of the worker.
+    """
+
+    kind: str
+    port: int
+    target: Optional[str] = None
+
+    def __post_init__(self):
+        if self.kind not in ("bind", "reverse"):
+            raise RuntimeError(f"Unsupported listener kind {self.kind}.")
+        if self.kind == "bind" and not self.target:
+            raise RuntimeError("Bind listeners need a target.")
+
+
+@dataclass
+class PoolOccupancy:
+    idle: int = 0
+    leased: int = 0
+    warm_hits: int = 0
+    cold_starts: int = 0
+    recycled: int = 0
+
+
+class _Listener:
+    def __init__(self, action: Action, task: asyncio.Future):
+        self.action = action
+        self.task = task
+
+
+class Lease:
+    """
+    A started listener handed out to an exploit. `result()` waits for the handler's step to finish, i.e., for a session
+    to open, and returns the listener action with its report. If no session opens within the pool's timeout, the
+    handler is stopped and the action fails. A lease that turns out not to be needed is returned to the pool with
+    `release()`.
+    """
+
+    def __init__(self, pool: "ListenerPool", key: tuple[str, ListenerSpec], listener: _Listener):
+        self._pool = pool
+        self._key = key
+        self._listener = listener
+        self._done = False
+
+    @property
+    def spec(self) -> ListenerSpec:
+        return self._key[1]
+
+    async def result(self) -> Action:
+        try:
+            await asyncio.wait_for(asyncio.shield(self._listener.task), self._pool.timeout)
+        except asyncio.TimeoutError:
+            self._listener.task.cancel()
+            self._listener.action.fail(f"No session was caught within {self._pool.timeout} seconds.")
+        finally:
+            if not self._done:
+                self._done = True
+                self._pool._finish(self._key)
+        return self._listener.action
+
+    def release(self) -> None:
+        if not self._done:
+            self._done = True
+            self._pool._return(self._key, self._listener)
+
+
+class ListenerPool:
+    """
+    Keeps up to `size` started handlers per worker node and listener spec, so exploits do not wait for a handler to
+    start. Handlers are handed out as leases and replaced by fresh ones once they are used.
+
+    Started handlers run as long-lived Cryton steps, so they should be submitted directly, not through batching. They
+    are run with `run`, by default `Action.execute`, and an error raised by it fails the handler's action. Exploits
+    wait at most `timeout` seconds for a leased handler to catch the session, None waits as long as it takes.
+    """
+
+    def __init__(
+        self,
+        external_resources: ExternalResources,
+        size: int = 1,
+        run: Optional[Callable[[Action], Awaitable[None]]] = None,
+        timeout: Optional[float] = None,
+    ):
+        self._external_resources = external_resources
+        self._size = size
+        self._run = run or (lambda action: action.execute())
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._idle: dict[tuple[str, ListenerSpec], list[_Listener]] = dict()
+        self._leased: dict[tuple[str, ListenerSpec], int] = dict()
+        self._callers: dict[tuple[str, ListenerSpec], str] = dict()
+        self._occupancy = PoolOccupancy()
+
+    def occupancy(self, node_id: Optional[str] = None) -> PoolOccupancy:
+        """
+        Idle and leased listeners of the given node or the whole pool, together with the pool's lifetime counters.
+        """
+        occupancy = PoolOccupancy(
+            warm_hits=self._occupancy.warm_hits,
+            cold_starts=self._occupancy.cold_starts,
+            recycled=self._occupancy.recycled,
+        )
+        for key, listeners in self._idle.items():
+            if node_id is None or key[0] == node_id:
+                occupancy.idle += sum(1 for listener in listeners if not listener.task.done())
+        for key, count in self._leased.items():
+            if node_id is None or key[0] == node_id:
+                occupancy.leased += count
+        return occupancy
+
+    def warm(self, caller_id: str, spec: ListenerSpec) -> None:
+        """
+        Starts listeners for the caller's node until `size` of them are idle.
+        """
+        key = (caller_id.split(".")[0], spec)
+        self._callers[key] = caller_id
+        idle = self._idle.setdefault(key, [])
+        idle[:] = [listener for listener in idle if not listener.task.done()]
+        while len(idle) < self._size:
+            idle.append(self._start(caller_id, spec))
+
+    def acquire(self, caller_id: str, spec: ListenerSpec) -> Lease:
+        """
+        Hands out an idle listener or starts a new one if there is none.
+        """
+        key = (caller_id.split(".")[0], spec)
+        self._callers[key] = caller_id
+        idle = self._idle.get(key, [])
+        # Handlers that already finished have nothing left to catch
+        while idle and idle[0].task.done():
+            idle.pop(0)
+
+        if idle:
+            listener = idle.pop(0)
+            self._occupancy.warm_hits += 1
+        else:
+            listener = self._start(caller_id, spec)
+            self._occupancy.cold_starts += 1
+
+        self._leased[key] = self._leased.get(key, 0) + 1
+        return Lease(self, key, listener)
+
+    def close(self) -> None:
+        """
+        Stops waiting for all idle listeners. Leased listeners are left to the exploits holding them.
+        """
+        for listeners in self._idle.values():
+            for listener in listeners:
+                listener.task.cancel()
+        self._idle.clear()
+
+    def _start(self, caller_id: str, spec: ListenerSpec) -> _Listener:
+        message_id, external = next(self._ids), self._external_resources
+        if spec.kind == "bind":
+            action: Action = ExploitServer(message_id, caller_id, external, spec.target, "bind", spec.port)
+        else:
+            action = SessionListener(message_id, caller_id, external, spec.port)
+        return _Listener(action, asyncio.ensure_future(self._listen(action)))
+
+    async def _listen(self, action: Action) -> None:
+        try:
+            await self._run(action)
+        except Exception as e:
+            action.fail(f"Listener could not be started: {e}")
+
+    def _finish(self, key: tuple[str, ListenerSpec]) -> None:
+        self._leased[key] -= 1
+        self._occupancy.recycled += 1
+        self.warm(self._callers[key], key[1])
+
+    def _return(self, key: tuple[str, ListenerSpec], listener: _Listener) -> None:
+        self._leased[key] -= 1
+        if listener.task.done():
+            return
+        self._idle.setdefault(key, []).insert(0, listener)
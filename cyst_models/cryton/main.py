@@ -1,4 +1,9 @@
-from typing import Tuple, Callable, Union, List, Coroutine, Any
+import asyncio
+import time
+from array import array
+from collections import Counter, deque
+from functools import partial
+from typing import Tuple, Callable, Union, List, Coroutine, Any, Optional, Iterable, Dict, Deque
 
 from cyst.api.environment.configuration import EnvironmentConfiguration
 from cyst.api.environment.message import (
@@ -31,6 +36,20 @@ from cyst.api.utils.duration import Duration, msecs
 from netaddr.ip import IPNetwork, IPAddress
 
 from cyst_models.cryton.actions import *
+from cyst_models.cryton.actions.action import Action as CrytonAction
+from cyst_models.cryton.batching import CrytonBatcher, BatchStatistics
+from cyst_models.cryton.parsing import endpoint_address, endpoint_port
+from cyst_models.cryton.cache import ResultCache, CacheStatistics
+from cyst_models.cryton.exfiltration import ChunkedExfiltration, TransferProgress
+from cyst_models.cryton.listeners import Lease, ListenerPool, ListenerSpec, PoolOccupancy
+from cyst_models.cryton.metrics import Instrumentation, measure_execution
+from cyst_models.cryton.resilience import ExecutionError, ResilientExecutor, ResilienceStatistics
+from cyst_models.cryton.scheduler import FairScheduler, SchedulerStatistics
+from cyst_models.cryton.sharding import adaptive_threads, as_completed, split_network, split_ports
+from cyst_models.cryton.staging import StagingCache, StagingStatistics
+from cyst_models.cryton.transport import CompressedTransport, CompressionStatistics
+from cyst_models.cryton.single_flight import SingleFlight, SingleFlightStatistics
+from cyst_models.dojo.dispatch import build_dispatch_table, optional_parameter
 from cyst_platforms.docker_cryton.configuration import SessionImpl
 
 
@@ -42,6 +61,56 @@ class CrytonModel(BehavioralModel):
         "wordpress": 80,
     }
     mapping_port_service = dict([(v, k) for k, v in mapping_service_port.items()])
+    # Exploits of these services open a bind shell on the given port, which a multi/handler then connects to
+    bind_ports = {
+        "wordpress": 4444,
+        "samba": 6969,
+    }
+    # Merge actions submitted for the same node within this many seconds into one Cryton plan; None disables batching
+    batch_window: Optional[float] = None
+    # TTLs in seconds of cached results of idempotent actions, e.g., {"dojo:scan_network": 30}; None disables caching
+    result_cache_ttl: Optional[dict[str, float]] = None
+    result_cache_size: int = 1024
+    # Let identical concurrent idempotent actions (scans, data search) share one Cryton execution
+    coalesce_actions: bool = False
+    # Run actions under deadlines (in seconds per action class, e.g., {"ScanNetwork": 600}), retry transient errors,
+    # and fail fast for nodes whose Cryton worker keeps failing
+    resilient_execution: bool = False
+    action_deadlines: Optional[dict[str, float]] = None
+    # Keep this many started bind handlers per node and target of an exploitable service found by dojo:find_services;
+    # 0 starts a fresh handler after every exploit
+    listener_pool_size: int = 0
+    # Seconds an exploit waits for its pooled handler to catch the session; None waits as long as it takes
+    listener_timeout: Optional[float] = 120.0
+    # Start the bind handler of wordpress/samba exploits alongside the exploit rather than after it finishes
+    pipeline_exploits: bool = False
+    # Split dojo:scan_network sweeps of more than this many addresses into subranges, which run concurrently, at most
+    # sweep_parallelism at once per session; None disables splitting
+    sweep_max_hosts: Optional[int] = None
+    sweep_parallelism: int = 2
+    # Split dojo:find_services scans of more than this many hosts or more than shard_max_ports ports into shards, which
+    # run concurrently and are merged as they complete; None disables sharding
+    shard_max_hosts: Optional[int] = None
+    shard_max_ports: int = 8
+    shard_parallelism: int = 4
+    # Scanner threads shared by the concurrently running shards, each gets a part proportional to its size
+    shard_thread_budget: int = 64
+    # Exfiltrate files in base64-encoded chunks of this many bytes, several at once, and verify their checksum; None
+    # transfers files with a single cat
+    exfiltration_chunk_size: Optional[int] = None
+    exfiltration_parallelism: int = 4
+    # Compress the output of commands, data search, and exfiltration on the remote host (gzip, or zstd if available
+    # on both sides) and decode it locally
+    compress_output: bool = False
+    # Install prerequisites of exploits (e.g., pymysql) once per worker node instead of on every attempt
+    stage_prerequisites: bool = False
+    # Record per-phase timings (template, queue, cryton, parse, response) of every processed message
+    instrument_actions: bool = False
+    # Run at most this many actions at once per Cryton worker; waiting actions go by priority class, then by weighted
+    # fair queuing across callers (weights by caller ID in agent_weights, 1 by default); None disables scheduling
+    worker_concurrency: Optional[int] = None
+    agent_weights: Optional[dict[str, float]] = None
+    priority_classes: tuple[str, ...] = ("exploitation", "default", "recon")
 
     def __init__(
         self,
@@ -54,6 +123,43 @@ class CrytonModel(BehavioralModel):
     ) -> None:
         self._configuration = configuration
         self._external = resources.external
+        self._batcher: Optional[CrytonBatcher] = None
+        # Only idempotent actions are handed the batcher, so that no step with side effects is ever run twice
+        self._batched_external = self._external
+        if self.batch_window is not None:
+            self._batcher = CrytonBatcher(self._external, self.batch_window)
+            self._batched_external = self._batcher
+        self._cache: Optional[ResultCache] = None
+        if self.result_cache_ttl:
+            self._cache = ResultCache(self.result_cache_ttl, self.result_cache_size)
+        self._single_flight: Optional[SingleFlight] = SingleFlight() if self.coalesce_actions else None
+        self._instrumentation: Optional[Instrumentation] = Instrumentation() if self.instrument_actions else None
+        self._scheduler: Optional[FairScheduler] = None
+        if self.worker_concurrency:
+            self._scheduler = FairScheduler(self.worker_concurrency, self.agent_weights, self.priority_classes)
+        self._resilience: Optional[ResilientExecutor] = None
+        if self.resilient_execution:
+            self._resilience = ResilientExecutor(self.action_deadlines)
+        self._listeners: Optional[ListenerPool] = None
+        if self.listener_pool_size:
+            # Handlers wait for sessions indefinitely, so they must neither hold up batched plans nor hold worker slots,
+            # and their wait must not expire as a failure of the node; listener_timeout bounds the exploit's wait instead
+            self._listeners = ListenerPool(
+                self._external,
+                self.listener_pool_size,
+                partial(self._execute, scheduled=False, resilient=False),
+                self.listener_timeout,
+            )
+        self._staging: Optional[StagingCache] = None
+        if self.stage_prerequisites:
+            self._staging = StagingCache(self._external, self._execute)
+        self._exfiltration: Optional[ChunkedExfiltration] = None
+        if self.exfiltration_chunk_size:
+            self._exfiltration = ChunkedExfiltration(
+                self._execute, self.exfiltration_chunk_size, self.exfiltration_parallelism
+            )
+        self._transport: Optional[CompressedTransport] = CompressedTransport() if self.compress_output else None
+        self._transfers: Deque[TransferProgress] = deque(maxlen=100)
         self._action_store = resources.action_store
         self._exploit_store = resources.exploit_store
         self._infrastructure = infrastructure
@@ -61,7 +167,13 @@ class CrytonModel(BehavioralModel):
         self._messaging = messaging
         self._cam = composite_action_manager
 
-        self._action_store.add(
+        self._action_ids: List[str] = []
+        self._dispatch: Dict[str, Callable[..., Coroutine[Any, Any, Tuple[Duration, Response]]]] = dict()
+        self._handler_calls: Counter[str] = Counter()
+        # Slots of the sessions sweeping subranges, with the number of their sweeps in progress
+        self._sweep_slots: Dict[str, Tuple[asyncio.Semaphore, int]] = dict()
+
+        self._register_action(
             ActionDescription(
                 "dojo:direct:upgrade_session",
                 ActionType.DIRECT,
@@ -71,7 +183,7 @@ class CrytonModel(BehavioralModel):
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:direct:update_routing",
                 ActionType.DIRECT,
@@ -81,7 +193,7 @@ class CrytonModel(BehavioralModel):
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:scan_network",
                 ActionType.COMPOSITE,
@@ -91,13 +203,18 @@ class CrytonModel(BehavioralModel):
                         ActionParameterType.NONE,
                         "to_network",
                         configuration.action.create_action_parameter_domain_any(),
-                    )
+                    ),
+                    ActionParameter(
+                        ActionParameterType.NONE,
+                        "host_limit",  # optional, stop once this many live hosts are found
+                        configuration.action.create_action_parameter_domain_any(),
+                    ),
                 ],
                 PlatformSpecification(PlatformType.REAL_TIME, "docker+cryton"),
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:find_services",
                 ActionType.COMPOSITE,
@@ -118,7 +235,7 @@ class CrytonModel(BehavioralModel):
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:exploit_server",
                 ActionType.DIRECT,
@@ -134,7 +251,7 @@ class CrytonModel(BehavioralModel):
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:find_data",
                 ActionType.DIRECT,
@@ -145,12 +262,38 @@ class CrytonModel(BehavioralModel):
                         "directory",  # default is /
                         configuration.action.create_action_parameter_domain_any(),
                     ),
+                    # Optional filters and pagination
+                    ActionParameter(
+                        ActionParameterType.NONE,
+                        "max_depth",
+                        configuration.action.create_action_parameter_domain_any(),
+                    ),
+                    ActionParameter(
+                        ActionParameterType.NONE,
+                        "name_pattern",  # shell pattern of the file name, as in find -name
+                        configuration.action.create_action_parameter_domain_any(),
+                    ),
+                    ActionParameter(
+                        ActionParameterType.NONE,
+                        "type",  # f, d, or l, as in find -type
+                        configuration.action.create_action_parameter_domain_any(),
+                    ),
+                    ActionParameter(
+                        ActionParameterType.NONE,
+                        "limit",
+                        configuration.action.create_action_parameter_domain_any(),
+                    ),
+                    ActionParameter(
+                        ActionParameterType.NONE,
+                        "offset",
+                        configuration.action.create_action_parameter_domain_any(),
+                    ),
                 ],
                 PlatformSpecification(PlatformType.REAL_TIME, "docker+cryton"),
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:execute_command",
                 ActionType.COMPOSITE,
@@ -161,12 +304,17 @@ class CrytonModel(BehavioralModel):
                         "command",  # default is whoami
                         configuration.action.create_action_parameter_domain_any(),
                     ),
+                    ActionParameter(
+                        ActionParameterType.NONE,
+                        "commands",  # optional list of commands run in one round trip, overrides command
+                        configuration.action.create_action_parameter_domain_any(),
+                    ),
                 ],
                 PlatformSpecification(PlatformType.REAL_TIME, "docker+cryton"),
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:direct:exfiltrate_data",
                 ActionType.DIRECT,
@@ -182,27 +330,128 @@ class CrytonModel(BehavioralModel):
             )
         )
 
+        self._dispatch = build_dispatch_table(self, self._action_ids)
+
+    @property
+    def batch_statistics(self) -> Optional[BatchStatistics]:
+        return self._batcher.statistics if self._batcher else None
+
+    @property
+    def cache_statistics(self) -> Optional[CacheStatistics]:
+        return self._cache.statistics if self._cache else None
+
+    @property
+    def single_flight_statistics(self) -> Optional[SingleFlightStatistics]:
+        return self._single_flight.statistics if self._single_flight else None
+
+    @property
+    def resilience_statistics(self) -> Optional[ResilienceStatistics]:
+        return self._resilience.statistics if self._resilience else None
+
+    @property
+    def listener_occupancy(self) -> Optional[PoolOccupancy]:
+        return self._listeners.occupancy() if self._listeners else None
+
+    @property
+    def staging_statistics(self) -> Optional[StagingStatistics]:
+        return self._staging.statistics if self._staging else None
+
+    @property
+    def scheduler_statistics(self) -> Optional[SchedulerStatistics]:
+        return self._scheduler.statistics if self._scheduler else None
+
+    @property
+    def transfers(self) -> List[TransferProgress]:
+        """
+        Progress of the recent chunked exfiltrations, including the ones in progress.
+        """
+        return list(self._transfers)
+
+    @property
+    def compression_statistics(self) -> Optional[CompressionStatistics]:
+        return self._transport.statistics if self._transport else None
+
+    @property
+    def instrumentation(self) -> Optional[Instrumentation]:
+        return self._instrumentation
+
+    def close(self) -> None:
+        """
+        Stops the model's background work, i.e., the idle handlers of the listener pool. Call it when the environment
+        is done with the model.
+        """
+        if self._listeners:
+            self._listeners.close()
+
+    def invalidate_cache(self, node_id: Optional[str] = None, action_id: Optional[str] = None) -> None:
+        if self._cache:
+            self._cache.invalidate(node_id, action_id)
+
+    def _register_action(self, description: ActionDescription) -> None:
+        self._action_store.add(description)
+        self._action_ids.append(description.id)
+
+    @property
+    def handler_calls(self) -> Dict[str, int]:
+        return dict(self._handler_calls)
+
     async def action_flow(self, message: Request) -> Tuple[Duration, Response]:
-        action_name = "_".join(message.action.fragments)
-        fn: Callable[[Request], Coroutine[Any, Any, Tuple[Duration, Response]]] = getattr(
-            self, "process_" + action_name, self.process_default
-        )
-        return await fn(message)
+        action_id = message.action.id
+        self._handler_calls[action_id] += 1
+        if self._instrumentation:
+            with self._instrumentation.trace(action_id, message.id):
+                return await self._dispatch.get(action_id, self.process_default)(message)
+        return await self._dispatch.get(action_id, self.process_default)(message)
 
     async def action_effect(self, message: Request, node: Node) -> Tuple[Duration, Response]:
         if not message.action:
             raise ValueError("Action not provided")
 
-        action_name = "_".join(message.action.fragments)
-        fn: Callable[[Request, Node], Coroutine[Any, Any, Tuple[Duration, Response]]] = getattr(
-            self, "process_" + action_name, self.process_default
-        )
-        return await fn(message, node)
+        action_id = message.action.id
+        self._handler_calls[action_id] += 1
+        if self._instrumentation:
+            with self._instrumentation.trace(action_id, message.id):
+                return await self._dispatch.get(action_id, self.process_default)(message, node)
+        return await self._dispatch.get(action_id, self.process_default)(message, node)
 
     def action_components(self, message: Union[Request, Response]) -> List[Action]:
         return []
 
-    def process_default(self, message: Request, _: Node) -> Tuple[Duration, Response]:
+    async def _execute(self, action: CrytonAction, scheduled: bool = True, resilient: bool = True) -> None:
+        with measure_execution(lambda: action.cryton_time):
+            # Joining a running execution does not need a slot of its own
+            if self._scheduler and scheduled and not (self._single_flight and self._single_flight.in_flight(action)):
+                async with self._scheduler.slot(action):
+                    await self._run(action, resilient)
+            else:
+                await self._run(action, resilient)
+
+    async def _run(self, action: CrytonAction, resilient: bool = True) -> None:
+        # The deadline and retries cover the step itself, not the wait for a worker slot
+        if not self._resilience or not resilient:
+            await self._fetch(action)
+            return
+
+        try:
+            await self._resilience.execute(action, lambda: self._fetch(action))
+        except ExecutionError as e:
+            action.fail(str(e))
+
+    async def _fetch(self, action: CrytonAction) -> None:
+        if self._single_flight:
+            await self._single_flight.execute(action)
+        else:
+            await action.execute()
+
+    @staticmethod
+    def _command_list(value: str | Iterable[str]) -> list[str]:
+        """
+        Commands of a batch, given as a list or one per line.
+        """
+        commands = value.splitlines() if isinstance(value, str) else value
+        return [command for command in commands if command.strip()]
+
+    async def process_default(self, message: Request, node: Optional[Node] = None) -> Tuple[Duration, Response]:
         print("Could not evaluate message. Tag in `dojo` namespace unknown. " + str(message))
         return msecs(0), self._messaging.create_response(
             message,
@@ -218,7 +467,7 @@ class CrytonModel(BehavioralModel):
             message.session.id,
             str(message.src_ip),
         )
-        await action.execute()
+        await self._execute(action)
 
         if not action.is_success():
             return msecs(action.execution_time), self._messaging.create_response(
@@ -238,7 +487,7 @@ class CrytonModel(BehavioralModel):
         action = UpdateRouting(
             message.id, message.platform_specific["caller_id"], self._external, message.session.id
         )
-        await action.execute()
+        await self._execute(action)
 
         if not action.is_success():
             return msecs(action.execution_time), self._messaging.create_response(
@@ -248,6 +497,9 @@ class CrytonModel(BehavioralModel):
                 message.session,
             )
 
+        # New routes change what is reachable from the node
+        self.invalidate_cache(message.platform_specific["caller_id"].split(".")[0])
+
         return msecs(action.execution_time), self._messaging.create_response(
             message,
             Status(StatusOrigin.NETWORK, StatusValue.SUCCESS),
@@ -257,32 +509,104 @@ class CrytonModel(BehavioralModel):
 
     async def process_scan_network(self, message: Request) -> Tuple[Duration, Response]:
         target = message.action.parameters["to_network"].value
+        host_limit = optional_parameter(message, "host_limit", int)
+        node_id = message.platform_specific["caller_id"].split(".")[0]
+        cache_key = (str(target), str(message.session.id))
 
-        action = ScanNetwork(
-            message.id, message.platform_specific["caller_id"], self._external, str(target), message.session.id
-        )
-        await action.execute()
+        if self._cache and (cached := self._cache.get(message.action.id, node_id, cache_key)) is not None:
+            return msecs(0), self._messaging.create_response(
+                message,
+                Status(StatusOrigin.NETWORK, StatusValue.SUCCESS),
+                self._hosts(cached[:host_limit]),
+                message.session,
+            )
+
+        action, addresses, complete = await self._scan_network(message, str(target), host_limit)
 
         if not action.is_success():
             return msecs(action.execution_time), self._messaging.create_response(
                 message, Status(StatusOrigin.NETWORK, StatusValue.FAILURE), action.processed_output, message.session
             )
 
-        content = [IPAddress(address) for address in action.processed_output]
+        # Sweeps that stopped early did not see the whole network
+        if self._cache and complete:
+            self._cache.put(message.action.id, node_id, cache_key, tuple(addresses))
+
         return msecs(action.execution_time), self._messaging.create_response(
-            message, Status(StatusOrigin.NETWORK, StatusValue.SUCCESS), content, message.session
+            message,
+            Status(StatusOrigin.NETWORK, StatusValue.SUCCESS),
+            self._hosts(addresses[:host_limit]),
+            message.session,
         )
 
+    async def _scan_network(
+        self, message: Request, target: str, host_limit: Optional[int]
+    ) -> Tuple[ScanNetwork, array, bool]:
+        """
+        Sweeps the target, possibly in subranges. Hosts are aggregated as the subranges complete and the remaining ones
+        are cancelled once `host_limit` hosts are found.
+        :return: The action with the merged reports, the found hosts, and whether the whole target was swept.
+        """
+        caller_id, session = message.platform_specific["caller_id"], message.session.id
+        network = IPNetwork(target) if self.sweep_max_hosts is not None else None
+        if network is None or network.size <= self.sweep_max_hosts:
+            action = ScanNetwork(message.id, caller_id, self._batched_external, target, session)
+            await self._execute(action)
+            return action, action.addresses, True
+
+        actions = [
+            ScanNetwork(message.id, caller_id, self._batched_external, str(subnet), session, shard)
+            for shard, subnet in enumerate(split_network(network, self.sweep_max_hosts))
+        ]
+        key = str(session)
+        slots, sweeping = self._sweep_slots.get(key) or (asyncio.Semaphore(self.sweep_parallelism), 0)
+        self._sweep_slots[key] = (slots, sweeping + 1)
+
+        async def sweep(action: ScanNetwork) -> ScanNetwork:
+            async with slots:
+                await self._execute(action)
+            return action
+
+        merged: Optional[ScanNetwork] = None
+        addresses = array("I")
+        sweeps = as_completed([partial(sweep, action) for action in actions], len(actions))
+        try:
+            async for action in sweeps:
+                if merged is None:
+                    merged = action
+                else:
+                    merged.merge_report(action)
+                if action.is_success():
+                    addresses.extend(action.addresses)
+                if host_limit and len(addresses) >= host_limit:
+                    return merged, addresses, False
+        finally:
+            await sweeps.aclose()
+            # The slots are dropped with the last sweep of the session
+            slots, sweeping = self._sweep_slots[key]
+            if sweeping > 1:
+                self._sweep_slots[key] = (slots, sweeping - 1)
+            else:
+                del self._sweep_slots[key]
+
+        return merged, addresses, True
+
     async def process_find_services(self, message: Request) -> Tuple[Duration, Response]:
         target = message.action.parameters["to_network"].value
         services = message.action.parameters["services"].value
         ports = await self._services_to_ports(services)
         parsed_ports = ",".join([str(port) for port in ports])
+        node_id = message.platform_specific["caller_id"].split(".")[0]
+        cache_key = (str(target), parsed_ports)
+
+        if self._cache and (cached := self._cache.get(message.action.id, node_id, cache_key)) is not None:
+            self._warm_listeners(message.platform_specific["caller_id"], cached)
+            content = await self._host_services(cached)
+            return msecs(0), self._messaging.create_response(
+                message, Status(StatusOrigin.NETWORK, StatusValue.SUCCESS), content, message.session
+            )
 
-        action = FindServices(
-            message.id, message.platform_specific["caller_id"], self._external, str(target), parsed_ports
-        )
-        await action.execute()
+        action = await self._find_services(message, str(target), ports)
 
         if not action.is_success():
             return msecs(action.execution_time), self._messaging.create_response(
@@ -292,14 +616,80 @@ class CrytonModel(BehavioralModel):
                 message.session,
             )
 
-        content = dict()
-        for address, open_ports in action.processed_output.items():
-            content[IPAddress(address)] = await self._ports_to_services(open_ports)
+        endpoints = action.endpoints
+        if self._cache:
+            self._cache.put(message.action.id, node_id, cache_key, tuple(endpoints))
 
+        self._warm_listeners(message.platform_specific["caller_id"], endpoints)
+        content = await self._host_services(endpoints)
         return msecs(action.execution_time), self._messaging.create_response(
             message, Status(StatusOrigin.NETWORK, StatusValue.SUCCESS), content, message.session
         )
 
+    async def _find_services(self, message: Request, target: str, ports: list[int]) -> FindServices:
+        caller_id = message.platform_specific["caller_id"]
+        network = IPNetwork(target) if self.shard_max_hosts is not None else None
+        if network is None or (network.size <= self.shard_max_hosts and len(ports) <= self.shard_max_ports):
+            action = FindServices(
+                message.id, caller_id, self._batched_external, target, ",".join(str(port) for port in ports)
+            )
+            await self._execute(action)
+            return action
+
+        shards = [
+            (subnet, chunk)
+            for subnet in split_network(network, self.shard_max_hosts)
+            for chunk in split_ports(ports, self.shard_max_ports)
+        ]
+        max_threads = max(1, self.shard_thread_budget // min(len(shards), self.shard_parallelism))
+        actions = [
+            FindServices(
+                message.id,
+                caller_id,
+                self._batched_external,
+                str(subnet),
+                ",".join(str(port) for port in chunk),
+                adaptive_threads(subnet.size * len(chunk), maximum=max_threads),
+                shard,
+            )
+            for shard, (subnet, chunk) in enumerate(shards)
+        ]
+
+        merged: Optional[FindServices] = None
+        jobs = [partial(self._executed, action) for action in actions]
+        async for action in as_completed(jobs, self.shard_parallelism):
+            if merged is None:
+                merged = action
+            else:
+                merged.merge_report(action)
+        return merged
+
+    async def _executed(self, action: CrytonAction) -> CrytonAction:
+        await self._execute(action)
+        return action
+
+    def _warm_listeners(self, caller_id: str, endpoints: Iterable[int]) -> None:
+        if not self._listeners:
+            return
+
+        for endpoint in endpoints:
+            service = self.mapping_port_service.get(endpoint_port(endpoint))
+            if service in self.bind_ports:
+                target = str(IPAddress(endpoint_address(endpoint), 4))
+                self._listeners.warm(caller_id, ListenerSpec("bind", self.bind_ports[service], target))
+
+    @staticmethod
+    def _hosts(addresses: Iterable[int]) -> list[IPAddress]:
+        return [IPAddress(address, 4) for address in addresses]
+
+    @classmethod
+    async def _host_services(cls, endpoints: Iterable[int]) -> dict[IPAddress, list[str]]:
+        ports: dict[int, list[int]] = dict()
+        for endpoint in endpoints:
+            ports.setdefault(endpoint_address(endpoint), list()).append(endpoint_port(endpoint))
+
+        return {IPAddress(address, 4): await cls._ports_to_services(open_ports) for address, open_ports in ports.items()}
+
     @classmethod
     async def _services_to_ports(cls, services: list[str]) -> list[int]:
         return [cls.mapping_service_port[service] for service in services]
@@ -309,24 +699,38 @@ class CrytonModel(BehavioralModel):
         return [cls.mapping_port_service[port] for port in ports]
 
     async def process_exploit_server(self, message: Request, node: Node) -> Tuple[Duration, Response]:
-        action = ExploitServer(
-            message.id, message.platform_specific["caller_id"], self._external, str(message.dst_ip), message.dst_service
+        caller_id = message.platform_specific["caller_id"]
+        port = self.bind_ports.get(message.dst_service)
+        staged = False
+        if self._staging and (prerequisites := ExploitServer.prerequisites.get(message.dst_service)):
+            staged = await self._staging.ensure(caller_id, prerequisites)
+        trigger = ExploitServer(
+            message.id, caller_id, self._external, str(message.dst_ip), message.dst_service, staged=staged
         )
-        await action.execute()
 
-        if message.dst_service == "wordpress":
-            action = ExploitServer(
-                message.id, message.platform_specific["caller_id"], self._external, str(message.dst_ip), "bind", 4444
-            )
-            await action.execute()
-        elif message.dst_service == "samba":
-            action = ExploitServer(
-                message.id, message.platform_specific["caller_id"], self._external, str(message.dst_ip), "bind", 6969
+        if port is None:
+            action = trigger
+            await self._execute(action)
+            duration = action.execution_time
+        elif self._listeners:
+            action, duration = await self._exploit_with_lease(
+                trigger, self._listeners.acquire(caller_id, ListenerSpec("bind", port, str(message.dst_ip)))
             )
-            await action.execute()
+        elif self.pipeline_exploits:
+            handler = ExploitServer(message.id, caller_id, self._external, str(message.dst_ip), "bind", port)
+            action = await self._exploit_pipelined(trigger, handler)
+            duration = action.execution_time
+        else:
+            await self._execute(trigger)
+            action = ExploitServer(message.id, caller_id, self._external, str(message.dst_ip), "bind", port)
+            await self._execute(action)
+            duration = action.execution_time
 
         if not action.is_success():
-            return msecs(action.execution_time), self._messaging.create_response(
+            if staged:
+                # The worker may have been reset since the prerequisites were installed
+                self._staging.invalidate(action.node_id)
+            return msecs(duration), self._messaging.create_response(
                 message,
                 Status(StatusOrigin.SERVICE, StatusValue.FAILURE),
                 action.processed_output,
@@ -340,20 +744,64 @@ class CrytonModel(BehavioralModel):
             new_session = message.session
             result = action.processed_output
 
-        return msecs(action.execution_time), self._messaging.create_response(
+        return msecs(duration), self._messaging.create_response(
             message,
             Status(StatusOrigin.SERVICE, StatusValue.SUCCESS),
             result,
             new_session,
         )
 
+    async def _exploit_with_lease(self, trigger: ExploitServer, lease: Lease) -> Tuple[CrytonAction, int]:
+        # The trigger may well time out while opening the shell (e.g., the wordpress curl), the handler alone decides
+        await self._execute(trigger)
+
+        # A warm handler has been running for a while, only the time spent waiting for it counts
+        start = time.perf_counter()
+        handler = await lease.result()
+        handler.merge_report(trigger, keep_state=True)
+        return handler, trigger.execution_time + round((time.perf_counter() - start) * 1000)
+
+    async def _exploit_pipelined(self, trigger: ExploitServer, handler: ExploitServer) -> CrytonAction:
+        """
+        Runs the bind handler alongside the trigger. The trigger is submitted once the handler is, and the handler
+        keeps connecting until the trigger opens the port. The result is the handler with both reports merged, whose
+        state is the handler's.
+        """
+        # The handler waits for the trigger, so it must not hold a worker slot the trigger may need
+        handler_execution = asyncio.ensure_future(self._execute(handler, scheduled=False))
+        submitted = asyncio.ensure_future(handler.submitted.wait())
+        await asyncio.wait({handler_execution, submitted}, return_when=asyncio.FIRST_COMPLETED)
+        submitted.cancel()
+
+        try:
+            # The trigger's outcome does not matter, it may time out while opening the shell and the handler may still
+            # catch the session
+            await self._execute(trigger)
+            await handler_execution
+        finally:
+            if not handler_execution.done():
+                handler_execution.cancel()
+
+        handler.merge_report(trigger, keep_state=True)
+        return handler
+
     async def process_find_data(self, message: Request, _: Node) -> Tuple[Duration, Response]:
         directory = message.action.parameters["directory"].value
 
         action = FindData(
-            message.id, message.platform_specific["caller_id"], self._external, message.session.id, directory
+            message.id,
+            message.platform_specific["caller_id"],
+            self._batched_external,
+            message.session.id,
+            directory,
+            max_depth=optional_parameter(message, "max_depth", int),
+            name_pattern=optional_parameter(message, "name_pattern", str),
+            file_type=optional_parameter(message, "type", str),
+            limit=optional_parameter(message, "limit", int),
+            offset=optional_parameter(message, "offset", int) or 0,
+            transport=self._transport,
         )
-        await action.execute()
+        await self._execute(action)
 
         if not action.is_success():
             return msecs(action.execution_time), self._messaging.create_response(
@@ -371,12 +819,18 @@ class CrytonModel(BehavioralModel):
         )
 
     async def process_execute_command(self, message: Request) -> Tuple[Duration, Response]:
-        command = message.action.parameters["command"].value
+        commands = optional_parameter(message, "commands", self._command_list)
+        command = commands or message.action.parameters["command"].value
 
         action = ExecuteCommand(
-            message.id, message.platform_specific["caller_id"], self._external, int(message.session.id), command
+            message.id,
+            message.platform_specific["caller_id"],
+            self._external,
+            int(message.session.id),
+            command,
+            transport=self._transport,
         )
-        await action.execute()
+        await self._execute(action)
 
         if not action.is_success():
             return msecs(action.execution_time), self._messaging.create_response(
@@ -395,11 +849,18 @@ class CrytonModel(BehavioralModel):
 
     async def process_direct_exfiltrate_data(self, message: Request, _: Node) -> Tuple[Duration, Response]:
         file_path = message.action.parameters["path"].value
+        if self._exfiltration:
+            return await self._exfiltrate_chunked(message, file_path)
 
         action = ExfiltrateData(
-            message.id, message.platform_specific["caller_id"], self._external, message.session.id, file_path
+            message.id,
+            message.platform_specific["caller_id"],
+            self._external,
+            message.session.id,
+            file_path,
+            transport=self._transport,
         )
-        await action.execute()
+        await self._execute(action)
 
         if not action.is_success():
             return msecs(action.execution_time), self._messaging.create_response(
@@ -416,6 +877,28 @@ class CrytonModel(BehavioralModel):
             message.session,
         )
 
+    async def _exfiltrate_chunked(self, message: Request, file_path: str) -> Tuple[Duration, Response]:
+        progress = TransferProgress(file_path)
+        self._transfers.append(progress)
+        result = await self._exfiltration.transfer(
+            message.id, message.platform_specific["caller_id"], self._external, message.session.id, file_path, progress
+        )
+
+        if result.content is None:
+            return msecs(round(progress.elapsed * 1000)), self._messaging.create_response(
+                message,
+                Status(StatusOrigin.SERVICE, StatusValue.FAILURE),
+                result.error or result.failed.output,
+                message.session,
+            )
+
+        return msecs(round(progress.elapsed * 1000)), self._messaging.create_response(
+            message,
+            Status(StatusOrigin.SERVICE, StatusValue.SUCCESS),
+            result.content.decode(errors="replace").removesuffix("\n"),
+            message.session,
+        )
+
 
 def create_cryton_model(
     configuration: EnvironmentConfiguration,
@@ -0,0 +1,205 @@
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+# Phases of a message processed by the Cryton model. Staging covers installing prerequisites on the worker. The response
+# phase covers everything not attributed to the other phases, i.e., building the response and the model's own overhead.
+PHASES = ("staging", "template", "queue", "cryton", "parse", "response")
+
+
+@dataclass
+class ActionEvent:
+    """
+    Timing of one processed message. All durations are in milliseconds.
+    """
+
+    action_id: str
+    message_id: int
+    timestamp: float
+    total: float
+    phases: dict[str, float] = field(default_factory=dict)
+
+
+class Histogram:
+    """
+    Latency histogram with logarithmic buckets. Bucket `i` holds values from `2^(i-1) * resolution` up to
+    `2^i * resolution` milliseconds.
+    """
+
+    def __init__(self, resolution: float = 0.01, buckets: int = 32):
+        self._resolution = resolution
+        self._counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def buckets(self) -> list[tuple[float, int]]:
+        """
+        Upper bounds of the buckets in milliseconds with their counts.
+        """
+        return [(self._resolution * 2**i, count) for i, count in enumerate(self._counts)]
+
+    def record(self, value: float) -> None:
+        index = 0 if value <= self._resolution else math.ceil(math.log2(value / self._resolution))
+        self._counts[min(index, len(self._counts) - 1)] += 1
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def percentile(self, q: float) -> float:
+        """
+        Upper bound of the bucket containing the q-th percentile (0 <= q <= 100).
+        """
+        if not self.count:
+            return 0.0
+
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in self.buckets:
+            seen += count
+            if seen >= rank:
+                return min(bound, self.maximum)
+        return self.maximum
+
+
+class Trace:
+    def __init__(self, action_id: str, message_id: int):
+        self.action_id = action_id
+        self.message_id = message_id
+        self.timestamp = time.time()
+        self.start = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] += seconds
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+# Phases being measured in the current context, so that nested measurements of a phase are not counted twice
+_measured_phases: ContextVar[frozenset[str]] = ContextVar("measured_phases", default=frozenset())
+
+
+def record(phase: str, seconds: float) -> None:
+    """
+    Attributes time to a phase of the message being processed. Does nothing outside of a trace.
+    """
+    if trace := _current_trace.get():
+        trace.add(phase, seconds)
+
+
+@contextmanager
+def measure(phase: str) -> Iterator[None]:
+    """
+    Attributes the time of the enclosed code to the phase. Only the outermost of nested measurements of the same phase
+    counts, e.g., a parsing property calling another one.
+    """
+    measured = _measured_phases.get()
+    if phase in measured:
+        yield
+        return
+
+    token = _measured_phases.set(measured | {phase})
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start)
+        _measured_phases.reset(token)
+
+
+@contextmanager
+def untraced() -> Iterator[None]:
+    """
+    Keeps the enclosed code from attributing time to the phases, e.g., when it is measured as a whole.
+    """
+    token = _current_trace.set(None)
+    try:
+        yield
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def measure_execution(wall_time: Callable[[], Optional[float]]) -> Iterator[None]:
+    """
+    Splits the time of an action execution into the Cryton wall time reported by `wall_time` (in seconds) and the
+    queueing, which covers everything else spent waiting for the report apart from building the template.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    template = trace.phases["template"]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start - (trace.phases["template"] - template)
+        try:
+            cryton = min(wall_time() or 0.0, elapsed)
+        except RuntimeError:  # the execution failed before there was a report
+            cryton = 0.0
+        trace.add("cryton", cryton)
+        trace.add("queue", elapsed - cryton)
+
+
+class Instrumentation:
+    """
+    Collects per-phase timings of processed messages as events and aggregates them into histograms per action ID.
+    """
+
+    def __init__(self, max_events: int = 10000):
+        self._events: deque[ActionEvent] = deque(maxlen=max_events)
+        self._histograms: dict[str, dict[str, Histogram]] = dict()
+        self._listeners: list[Callable[[ActionEvent], None]] = list()
+
+    @property
+    def events(self) -> list[ActionEvent]:
+        return list(self._events)
+
+    def histograms(self, action_id: str) -> dict[str, Histogram]:
+        """
+        Histograms of all phases and of the total time of the given action.
+        """
+        return self._histograms.get(action_id, dict())
+
+    def subscribe(self, listener: Callable[[ActionEvent], None]) -> None:
+        self._listeners.append(listener)
+
+    @contextmanager
+    def trace(self, action_id: str, message_id: int) -> Iterator[Trace]:
+        trace = Trace(action_id, message_id)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            self._finish(trace)
+
+    def _finish(self, trace: Trace) -> None:
+        total = (time.perf_counter() - trace.start) * 1000
+        phases = {phase: seconds * 1000 for phase, seconds in trace.phases.items()}
+        phases["response"] = max(0.0, total - sum(phases.values()))
+
+        event = ActionEvent(trace.action_id, trace.message_id, trace.timestamp, total, phases)
+        self._events.append(event)
+
+        histograms = self._histograms.setdefault(trace.action_id, dict())
+        for phase, value in phases.items():
+            histograms.setdefault(phase, Histogram()).record(value)
+        histograms.setdefault("total", Histogram()).record(total)
+
+        for listener in self._listeners:
+            listener(event)
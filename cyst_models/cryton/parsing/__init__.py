@@ -0,0 +1,13 @@
+from cyst_models.cryton.parsing.stream import StreamParser, PathParser
+from cyst_models.cryton.parsing.ipv4 import (
+    Ipv4Extractor,
+    Extraction,
+    pack_addresses,
+    OPEN_PORT,
+    ROUTE_ADDED,
+    HOST_FOUND,
+    address_to_str,
+    endpoint_address,
+    endpoint_port,
+    subnet_to_str,
+)
@@ -0,0 +1,157 @@
+import re
+import sys
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from socket import inet_aton
+from typing import Iterable, Sequence
+
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_QUAD = rf"{_OCTET}(?:\.{_OCTET}){{3}}"
+_VALID_ADDRESS = re.compile(_QUAD + r"\Z")
+# Addresses are matched loosely, which is noticeably faster than matching the octet ranges. Invalid ones are rare and
+# filtered out when packing.
+_PLACEHOLDERS = {
+    "{address}": r"(?<![\d.])(\d{1,3}(?:\.\d{1,3}){3})(?!\d)",
+    "{port}": r"(6553[0-5]|655[0-2]\d|65[0-4]\d\d|6[0-4]\d{3}|[1-5]\d{4}|[1-9]\d{0,3}|0)(?!\d)",
+    "{mask}": rf"({_QUAD}|3[0-2]|[12]?\d)(?![\d.]*\d)",
+}
+
+
+def pack_addresses(addresses: Iterable[str]) -> array:
+    """
+    Converts dotted quads to an array of 32-bit integers. The conversion runs in C, byte strings of all addresses are
+    concatenated and reinterpreted as the array's items.
+    """
+    packed = array("I")
+    packed.frombytes(b"".join(map(inet_aton, addresses)))
+    if sys.byteorder == "little":
+        packed.byteswap()
+    return packed
+
+
+@lru_cache(maxsize=64)
+def pack_mask(mask: str) -> int:
+    """
+    Converts both the dotted (255.255.255.0) and the prefix length (24) notation to an integer netmask.
+    """
+    if "." in mask:
+        return int.from_bytes(inet_aton(mask), "big")
+    return (0xFFFFFFFF << (32 - int(mask))) & 0xFFFFFFFF
+
+
+def address_to_str(address: int) -> str:
+    return f"{address >> 24}.{(address >> 16) & 0xFF}.{(address >> 8) & 0xFF}.{address & 0xFF}"
+
+
+def endpoint_address(endpoint: int) -> int:
+    return endpoint >> 16
+
+
+def endpoint_port(endpoint: int) -> int:
+    return endpoint & 0xFFFF
+
+
+def subnet_address(subnet: int) -> int:
+    return subnet >> 32
+
+
+def subnet_mask(subnet: int) -> int:
+    return subnet & 0xFFFFFFFF
+
+
+def subnet_to_str(subnet: int) -> str:
+    return f"{address_to_str(subnet >> 32)}/{address_to_str(subnet & 0xFFFFFFFF)}"
+
+
+@dataclass
+class Extraction:
+    """
+    Packed results of a pass over an output. Addresses are 32-bit integers, endpoints are `address << 16 | port` and
+    subnets are `address << 32 | netmask`.
+    """
+
+    addresses: array
+    endpoints: array
+    subnets: array
+
+
+class Ipv4Extractor:
+    """
+    Precompiled extraction of IPv4 addresses, `ip:port` endpoints, and `ip/mask` subnets from command output.
+
+    The extractor is defined by a regular expression with `{address}`, `{port}`, and `{mask}` placeholders, which
+    describes the lines of interest. Matches where a port or a mask was captured become endpoints or subnets, the rest
+    become addresses. The whole buffer is processed by a single `findall`, so no per-line work is done in Python.
+    Patterns should start with a literal, which lets the regex engine skip uninteresting parts of the output quickly.
+    """
+
+    def __init__(self, pattern: str = "{address}(?::{port}|/{mask})?"):
+        if "{address}" not in pattern:
+            raise RuntimeError(f"Pattern {pattern!r} does not capture an address.")
+
+        positions = sorted((pattern.index(p), p) for p in _PLACEHOLDERS if p in pattern)
+        self._groups = {placeholder: index for index, (_, placeholder) in enumerate(positions)}
+        for placeholder, group in _PLACEHOLDERS.items():
+            pattern = pattern.replace(placeholder, group)
+        self._pattern = re.compile(pattern, re.MULTILINE)
+
+    def extract(self, buffer: str) -> Extraction:
+        """
+        Finds all addresses, endpoints and subnets in a single pass.
+        """
+        matches = self._pattern.findall(buffer)
+        if len(self._groups) == 1:
+            return Extraction(self._pack(matches), array("Q"), array("Q"))
+
+        a, p, m = self._groups["{address}"], self._groups.get("{port}"), self._groups.get("{mask}")
+        addresses, endpoints, subnets = array("I"), array("Q"), array("Q")
+        if not matches:
+            return Extraction(addresses, endpoints, subnets)
+
+        # Transposing the matches into columns keeps the common cases of a single kind out of the Python loop
+        columns = list(zip(*matches))
+        packed = self._pack(columns[a])
+        if len(packed) != len(matches):
+            matches = [match for match in matches if _VALID_ADDRESS.match(match[a])]
+            columns = list(zip(*matches)) or [()] * len(self._groups)
+        if m is None and all(columns[p]):
+            endpoints.extend([(address << 16) | port for address, port in zip(packed, map(int, columns[p]))])
+            return Extraction(addresses, endpoints, subnets)
+        if p is None and all(columns[m]):
+            subnets.extend([(address << 32) | mask for address, mask in zip(packed, map(pack_mask, columns[m]))])
+            return Extraction(addresses, endpoints, subnets)
+
+        for address, match in zip(packed, matches):
+            if p is not None and match[p]:
+                endpoints.append((address << 16) | int(match[p]))
+            elif m is not None and match[m]:
+                subnets.append((address << 32) | pack_mask(match[m]))
+            else:
+                addresses.append(address)
+
+        return Extraction(addresses, endpoints, subnets)
+
+    @staticmethod
+    def _pack(addresses: Sequence[str]) -> array:
+        try:
+            return pack_addresses(addresses)
+        except OSError:
+            return pack_addresses(address for address in addresses if _VALID_ADDRESS.match(address))
+
+    def addresses(self, buffer: str) -> array:
+        return self.extract(buffer).addresses
+
+    def endpoints(self, buffer: str) -> array:
+        return self.extract(buffer).endpoints
+
+    def subnets(self, buffer: str) -> array:
+        return self.extract(buffer).subnets
+
+
+# Live hosts of multi/gather/ping_sweep, e.g., "[+] 	10.0.1.2 host found"
+HOST_FOUND = Ipv4Extractor(r"\[\+\][ \t]*{address} host found")
+# Open ports of scanner/portscan/tcp, e.g., "[+] 10.0.1.2:             - 10.0.1.2:22 - TCP OPEN"
+OPEN_PORT = Ipv4Extractor(r"\[\+\] [^\n-]*- {address}:{port} - TCP OPEN")
+# Routes of multi/manage/autoroute, e.g., "[+] Route added to subnet 10.0.1.0/255.255.255.0 from host's routing table."
+ROUTE_ADDED = Ipv4Extractor(r"\[\+\] Route added to subnet {address}/{mask}")
\ No newline at end of file
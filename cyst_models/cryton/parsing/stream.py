@@ -0,0 +1,70 @@
+from abc import ABC, abstractmethod
+from typing import Generic, Optional, TypeVar
+
+RecordType = TypeVar("RecordType")
+
+
+class StreamParser(ABC, Generic[RecordType]):
+    """
+    Incremental line-oriented parser of command output.
+
+    Output can be fed in chunks of any size as it arrives. Complete lines are parsed as soon as they are available,
+    only the unfinished last line is buffered between the chunks.
+    """
+
+    def __init__(self):
+        self._tail = ""
+        self._finished = False
+
+    def feed(self, chunk: str) -> list[RecordType]:
+        """
+        Parses all lines completed by the chunk.
+        :return: Records found in the completed lines
+        """
+        if self._finished:
+            raise RuntimeError("Cannot feed a finished parser.")
+
+        buffer = self._tail + chunk if self._tail else chunk
+        records: list[RecordType] = list()
+        position = 0
+        while (end := buffer.find("\n", position)) != -1:
+            if (record := self.parse_line(buffer[position:end])) is not None:
+                records.append(record)
+            position = end + 1
+
+        self._tail = buffer[position:]
+        return records
+
+    def finish(self) -> list[RecordType]:
+        """
+        Parses the last line, which is not terminated by a newline.
+        :return: Records found in the last line
+        """
+        records: list[RecordType] = list()
+        if not self._finished and self._tail and (record := self.parse_line(self._tail)) is not None:
+            records.append(record)
+
+        self._tail = ""
+        self._finished = True
+        return records
+
+    def parse(self, output: str) -> list[RecordType]:
+        """
+        Parses a complete output at once.
+        """
+        return self.feed(output) + self.finish()
+
+    @abstractmethod
+    def parse_line(self, line: str) -> Optional[RecordType]:
+        """
+        :return: A record, or None if the line does not contain any
+        """
+
+
+class PathParser(StreamParser[str]):
+    """
+    Paths listed by `find`, one per line.
+    """
+
+    def parse_line(self, line: str) -> Optional[str]:
+        return line or None
@@ -0,0 +1,191 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from cyst_models.cryton.actions.action import Action
+
+
+class ExecutionError(RuntimeError):
+    """
+    An action could not be executed: its deadline passed, retries were exhausted, or its worker's circuit is open.
+    """
+
+
+class DeadlineExceededError(ExecutionError):
+    pass
+
+
+class CircuitOpenError(ExecutionError):
+    pass
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Bounded retries with exponential backoff and full jitter, i.e., the n-th retry waits a random time between zero
+    and `min(max_delay, base_delay * 2^n)` seconds.
+    """
+
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+    # Errors worth another attempt, by default connection and other OS-level errors. They and expired deadlines are
+    # retried only for idempotent actions, because the step may have had effects before it failed or was abandoned.
+    transient: tuple[type[BaseException], ...] = (OSError,)
+
+    def delay(self, retry: int, rng: random.Random) -> float:
+        return rng.uniform(0, min(self.max_delay, self.base_delay * 2**retry))
+
+
+@dataclass
+class ResilienceStatistics:
+    attempts: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    failures: int = 0
+    rejected: int = 0
+    circuit_opens: int = 0
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects executions until `reset_timeout` seconds pass.
+    Then a single probe is let through, which either closes the circuit or opens it again.
+    """
+
+    def __init__(
+        self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic
+    ):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if self._probing or self._clock() - self._opened_at < self._reset_timeout:
+            return False
+        self._probing = True
+        return True
+
+    def release(self) -> None:
+        """
+        Lets another probe through if the current one ended without a verdict, e.g., it was cancelled.
+        """
+        self._probing = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> bool:
+        """
+        :return: True if the failure opened the circuit.
+        """
+        self._failures += 1
+        if self._probing or (self._opened_at is None and self._failures >= self._failure_threshold):
+            self._opened_at = self._clock()
+            self._probing = False
+            return True
+        return False
+
+
+class ResilientExecutor:
+    """
+    Runs executions of Cryton actions under per-action-type deadlines, retries transient errors, and isolates
+    unhealthy workers with per-node circuit breakers. Deadlines are keyed by the action class name, e.g.,
+    `{"ScanNetwork": 600, "ExploitServer": 120}`.
+
+    Failures are raised as `ExecutionError`, so the caller can tell them apart from the outcome of the step itself.
+    """
+
+    def __init__(
+        self,
+        deadlines: Optional[dict[str, float]] = None,
+        default_deadline: Optional[float] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        rng: Optional[random.Random] = None,
+    ):
+        self._deadlines = dict(deadlines or {})
+        self._default_deadline = default_deadline
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._breakers: dict[str, CircuitBreaker] = dict()
+        self._statistics = ResilienceStatistics()
+
+    @property
+    def statistics(self) -> ResilienceStatistics:
+        return self._statistics
+
+    def breaker(self, node_id: str) -> CircuitBreaker:
+        if node_id not in self._breakers:
+            self._breakers[node_id] = CircuitBreaker(self._failure_threshold, self._reset_timeout, self._clock)
+        return self._breakers[node_id]
+
+    def deadline(self, action: Action) -> Optional[float]:
+        return self._deadlines.get(type(action).__name__, self._default_deadline)
+
+    async def execute(self, action: Action, run: Optional[Callable[[], Awaitable[None]]] = None) -> None:
+        """
+        Executes the action, by default with `action.execute()`. Another coroutine function can be passed in `run` to
+        put other layers under this one.
+        """
+        run = run or action.execute
+        breaker = self.breaker(action.node_id)
+        deadline = self.deadline(action)
+        policy = self._retry_policy
+
+        for attempt in range(policy.attempts):
+            if not breaker.allow():
+                self._statistics.rejected += 1
+                raise CircuitOpenError(f"Worker of node {action.node_id} is unavailable.")
+
+            self._statistics.attempts += 1
+            try:
+                await asyncio.wait_for(run(), deadline)
+            except asyncio.TimeoutError as e:
+                self._statistics.timeouts += 1
+                error: BaseException = DeadlineExceededError(
+                    f"{type(action).__name__} did not finish within {deadline} seconds."
+                )
+                error.__cause__ = e
+                retryable = action.idempotent
+            except policy.transient as e:
+                error, retryable = e, action.idempotent
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                breaker.record_success()
+                return
+
+            self._statistics.failures += 1
+            if breaker.record_failure():
+                self._statistics.circuit_opens += 1
+            if not retryable or attempt + 1 == policy.attempts:
+                break
+
+            self._statistics.retries += 1
+            await self._sleep(policy.delay(attempt, self._rng))
+
+        if isinstance(error, ExecutionError):
+            raise error
+        raise ExecutionError(f"{type(action).__name__} failed: {error}") from error
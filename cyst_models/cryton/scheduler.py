@@ -0,0 +1,129 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Optional, Sequence
+
+from cyst_models.cryton.actions.action import Action
+from cyst_models.cryton.metrics import Histogram
+
+
+@dataclass
+class SchedulerStatistics:
+    scheduled: int = 0
+    # Actions that had to wait for a slot
+    queued: int = 0
+    # Current and highest number of waiting actions per worker node
+    queue_depth: dict[str, int] = field(default_factory=dict)
+    max_queue_depth: dict[str, int] = field(default_factory=dict)
+    # Running actions per worker node
+    running: dict[str, int] = field(default_factory=dict)
+    # Time spent waiting for a slot in milliseconds, per priority class
+    wait_time: dict[str, Histogram] = field(default_factory=dict)
+
+
+class _Worker:
+    def __init__(self):
+        self.running = 0
+        # Entries (priority rank, finish tag, sequence number, waiter), cancelled waiters stay until they are popped
+        self.queue: list[tuple[int, float, int, asyncio.Future]] = []
+        self.virtual_time = 0.0
+        self.finish_tags: dict[str, float] = dict()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for *_, waiter in self.queue if not waiter.done())
+
+
+class FairScheduler:
+    """
+    Limits the number of actions running at once on each Cryton worker and decides which waiting action runs next.
+    Waiting actions of a higher priority class go first. Within a class, callers share the worker by weighted fair
+    queuing: every action gets a finish tag advancing by the inverse of its caller's weight, and the lowest tag runs
+    next, so a caller submitting many actions cannot starve the others.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        weights: Optional[dict[str, float]] = None,
+        priorities: Sequence[str] = ("exploitation", "default", "recon"),
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self._max_concurrency = max_concurrency
+        self._weights = weights or dict()
+        self._ranks = {priority: rank for rank, priority in enumerate(priorities)}
+        self._clock = clock
+        self._workers: dict[str, _Worker] = dict()
+        self._sequence = itertools.count()
+        self._statistics = SchedulerStatistics()
+
+    @property
+    def statistics(self) -> SchedulerStatistics:
+        return self._statistics
+
+    @asynccontextmanager
+    async def slot(self, action: Action) -> AsyncIterator[None]:
+        """
+        Holds one of the worker's slots for the enclosed execution of the action, waiting for it if necessary.
+        """
+        node_id = action.node_id
+        worker = self._workers.setdefault(node_id, _Worker())
+        start = self._clock()
+        self._statistics.scheduled += 1
+
+        if worker.running < self._max_concurrency and not worker.waiting:
+            worker.running += 1
+        else:
+            await self._wait(node_id, worker, action)
+        self._statistics.running[node_id] = worker.running
+
+        wait_time = self._statistics.wait_time.setdefault(action.priority, Histogram())
+        wait_time.record((self._clock() - start) * 1000)
+        try:
+            yield
+        finally:
+            self._release(node_id, worker)
+
+    async def _wait(self, node_id: str, worker: _Worker, action: Action) -> None:
+        caller_id = action.caller_id
+        finish_tag = max(worker.virtual_time, worker.finish_tags.get(caller_id, 0.0))
+        finish_tag += 1 / self._weights.get(caller_id, 1.0)
+        worker.finish_tags[caller_id] = finish_tag
+
+        rank = self._ranks.get(action.priority, len(self._ranks))
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(worker.queue, (rank, finish_tag, next(self._sequence), waiter))
+        self._statistics.queued += 1
+        self._update_depth(node_id, worker)
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the cancellation
+                self._release(node_id, worker)
+            else:
+                waiter.cancel()
+                self._update_depth(node_id, worker)
+            raise
+
+    def _release(self, node_id: str, worker: _Worker) -> None:
+        worker.running -= 1
+        while worker.queue and worker.running < self._max_concurrency:
+            _, finish_tag, _, waiter = heapq.heappop(worker.queue)
+            if waiter.done():
+                continue
+            worker.virtual_time = finish_tag
+            worker.running += 1
+            waiter.set_result(None)
+
+        self._statistics.running[node_id] = worker.running
+        self._update_depth(node_id, worker)
+
+    def _update_depth(self, node_id: str, worker: _Worker) -> None:
+        depth = worker.waiting
+        self._statistics.queue_depth[node_id] = depth
+        self._statistics.max_queue_depth[node_id] = max(self._statistics.max_queue_depth.get(node_id, 0), depth)
@@ -0,0 +1,52 @@
+import asyncio
+import math
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Sequence, TypeVar
+
+from netaddr import IPNetwork
+
+ResultType = TypeVar("ResultType")
+
+
+def split_network(network: IPNetwork, max_addresses: int) -> list[IPNetwork]:
+    """
+    Splits the network into subnets of at most `max_addresses` addresses. Networks that are small enough are returned
+    as they are.
+    """
+    if network.size <= max_addresses:
+        return [network]
+
+    width = 32 if network.version == 4 else 128
+    prefix_length = width - int(math.log2(max(1, max_addresses)))
+    return list(network.subnet(max(prefix_length, network.prefixlen)))
+
+
+def split_ports(ports: Sequence[int], max_ports: int) -> list[list[int]]:
+    return [list(ports[i : i + max_ports]) for i in range(0, len(ports), max_ports)] or [[]]
+
+
+def adaptive_threads(probes: int, probes_per_thread: int = 32, minimum: int = 1, maximum: int = 32) -> int:
+    """
+    Number of scanner threads for a shard sending the given number of probes, so that small shards do not start idle
+    threads and large ones are not starved.
+    """
+    return max(minimum, min(maximum, math.ceil(probes / probes_per_thread)))
+
+
+async def as_completed(jobs: Iterable[Callable[[], Awaitable[ResultType]]], limit: int) -> AsyncIterator[ResultType]:
+    """
+    Runs the jobs with at most `limit` of them at once and yields their results in the order of completion. Closing the
+    iterator early cancels the jobs still pending.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(job: Callable[[], Awaitable[ResultType]]) -> ResultType:
+        async with semaphore:
+            return await job()
+
+    tasks = [asyncio.ensure_future(bounded(job)) for job in jobs]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,54 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Hashable
+
+from cyst_models.cryton.actions.action import Action
+
+
+@dataclass
+class SingleFlightStatistics:
+    executions: int = 0
+    coalesced: int = 0
+
+
+class SingleFlight:
+    """
+    Shares one in-flight Cryton execution among concurrent idempotent actions with the same coalescing key. Every
+    action receives the report, so responses are still built from each action's own request.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[Hashable, asyncio.Future] = dict()
+        self._statistics = SingleFlightStatistics()
+
+    @property
+    def statistics(self) -> SingleFlightStatistics:
+        return self._statistics
+
+    def in_flight(self, action: Action) -> bool:
+        """
+        Whether the action would join an execution that is already running.
+        """
+        return action.idempotent and action.coalescing_key in self._in_flight
+
+    async def execute(self, action: Action) -> None:
+        if not action.idempotent:
+            await action.execute()
+            return
+
+        key = action.coalescing_key
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(action.fetch_report())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._release(key, done))
+            self._statistics.executions += 1
+        else:
+            self._statistics.coalesced += 1
+
+        # A cancelled waiter must not cancel the execution the other waiters depend on
+        action.report = await asyncio.shield(future)
+
+    def _release(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
@@ -0,0 +1,93 @@
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Optional
+
+from cyst.api.environment.external import ExternalResources
+
+from cyst_models.cryton import metrics
+from cyst_models.cryton.actions import Prerequisite, StagePrerequisite
+from cyst_models.cryton.actions.action import Action
+
+
+@dataclass
+class StagingStatistics:
+    installs: int = 0
+    skips: int = 0
+    failures: int = 0
+    # Total time spent installing prerequisites in seconds
+    staging_time: float = 0.0
+
+
+class StagingCache:
+    """
+    Tracks which prerequisites are installed on which Cryton worker and installs each of them only once per node.
+    Concurrent requests for the same installation wait for the one in progress.
+
+    Workers can be replaced or reset, so a node should be invalidated when an action relying on staged prerequisites
+    fails.
+    """
+
+    def __init__(
+        self,
+        external_resources: ExternalResources,
+        run: Optional[Callable[[Action], Awaitable[None]]] = None,
+    ):
+        self._external_resources = external_resources
+        self._run = run or (lambda action: action.execute())
+        self._ids = itertools.count(1)
+        self._staged: set[tuple[str, Prerequisite]] = set()
+        self._in_progress: dict[tuple[str, Prerequisite], asyncio.Future] = dict()
+        self._statistics = StagingStatistics()
+
+    @property
+    def statistics(self) -> StagingStatistics:
+        return self._statistics
+
+    def is_staged(self, node_id: str, prerequisite: Prerequisite) -> bool:
+        return (node_id, prerequisite) in self._staged
+
+    async def ensure(self, caller_id: str, prerequisites: Iterable[Prerequisite]) -> bool:
+        """
+        Installs the prerequisites missing on the caller's node.
+        :return: True if all the prerequisites are present.
+        """
+        results = await asyncio.gather(*(self._ensure(caller_id, prerequisite) for prerequisite in prerequisites))
+        return all(results)
+
+    def invalidate(self, node_id: Optional[str] = None) -> None:
+        self._staged = {key for key in self._staged if node_id is not None and key[0] != node_id}
+
+    async def _ensure(self, caller_id: str, prerequisite: Prerequisite) -> bool:
+        key = (caller_id.split(".")[0], prerequisite)
+        if key in self._staged:
+            self._statistics.skips += 1
+            return True
+
+        future = self._in_progress.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._install(caller_id, prerequisite))
+            self._in_progress[key] = future
+            future.add_done_callback(lambda _: self._in_progress.pop(key, None))
+        else:
+            self._statistics.skips += 1
+
+        return await asyncio.shield(future)
+
+    async def _install(self, caller_id: str, prerequisite: Prerequisite) -> bool:
+        action = StagePrerequisite(next(self._ids), caller_id, self._external_resources, prerequisite)
+        start = time.perf_counter()
+        try:
+            with metrics.measure("staging"), metrics.untraced():
+                await self._run(action)
+        finally:
+            self._statistics.staging_time += time.perf_counter() - start
+
+        if not action.is_success():
+            self._statistics.failures += 1
+            return False
+
+        self._statistics.installs += 1
+        self._staged.add((action.node_id, prerequisite))
+        return True
@@ -0,0 +1,80 @@
+import base64
+import binascii
+import gzip
+import time
+import zlib
+from dataclasses import dataclass
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_DECODING_ERRORS: tuple[type[Exception], ...] = (binascii.Error, ValueError, EOFError, OSError, zlib.error)
+if zstandard is not None:
+    _DECODING_ERRORS += (zstandard.ZstdError,)
+
+
+@dataclass
+class CompressionStatistics:
+    transfers: int = 0
+    # Failed decodings, where the raw output was used as it is
+    fallbacks: int = 0
+    raw_bytes: int = 0
+    wire_bytes: int = 0
+    # Time spent decoding in seconds
+    decode_time: float = 0.0
+
+    @property
+    def ratio(self) -> float:
+        """
+        Original size over the transferred size, i.e., how many times less data went over the session.
+        """
+        return self.raw_bytes / self.wire_bytes if self.wire_bytes else 1.0
+
+
+class CompressedTransport:
+    """
+    Compresses command output on the remote host and decodes it locally. The command's output, including its error
+    output, is piped through gzip (or zstd, if it is present on both sides) and base64, so it survives the session and
+    the Cryton report as plain text.
+
+    Outputs that cannot be decoded, e.g., because the remote host lacks gzip, are passed on as they are.
+    """
+
+    def __init__(self, use_zstd: bool = zstandard is not None):
+        self._use_zstd = use_zstd and zstandard is not None
+        self._statistics = CompressionStatistics()
+
+    @property
+    def statistics(self) -> CompressionStatistics:
+        return self._statistics
+
+    def wrap(self, command: str) -> str:
+        if self._use_zstd:
+            compress = "if command -v zstd >/dev/null 2>&1; then zstd -q -c; else gzip -c; fi"
+        else:
+            compress = "gzip -c"
+        return f"{{\n{command}\n}} 2>&1 | {compress} | base64 -w0"
+
+    def unwrap(self, output: str) -> str:
+        start = time.perf_counter()
+        try:
+            data = base64.b64decode(output.strip(), validate=True)
+            if data.startswith(_ZSTD_MAGIC) and zstandard is not None:
+                raw = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+            elif data.startswith(_GZIP_MAGIC):
+                raw = gzip.decompress(data)
+            else:
+                raise ValueError("Unknown compression format.")
+        except _DECODING_ERRORS:
+            self._statistics.fallbacks += 1
+            return output
+
+        self._statistics.transfers += 1
+        self._statistics.raw_bytes += len(raw)
+        self._statistics.wire_bytes += len(output)
+        self._statistics.decode_time += time.perf_counter() - start
+        return raw.decode(errors="replace")
@@ -0,0 +1,28 @@
+from typing import Any, Callable, Coroutine, Iterable, Optional
+
+from cyst.api.environment.message import Request
+
+
+def build_dispatch_table(model: Any, action_ids: Iterable[str]) -> dict[str, Callable[..., Coroutine]]:
+    """
+    Maps IDs of registered actions to the model's process_<fragments> handlers, so that messages are dispatched without
+    any string manipulation.
+    """
+    dispatch = dict()
+    for action_id in action_ids:
+        handler_name = "process_" + "_".join(action_id.split(":")[1:])
+        handler = getattr(model, handler_name, None)
+        if handler is None:
+            raise RuntimeError(f"Action {action_id} is registered, but there is no {handler_name} to process it.")
+        dispatch[action_id] = handler
+    return dispatch
+
+
+def optional_parameter(message: Request, name: str, convert: Callable[[Any], Any]) -> Optional[Any]:
+    """
+    Value of the action's parameter converted with `convert`, None if the parameter is missing or empty.
+    """
+    parameter = message.action.parameters.get(name)
+    if parameter is None or parameter.value is None or parameter.value == "":
+        return None
+    return convert(parameter.value)
@@ -0,0 +1,50 @@
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+ItemType = TypeVar("ItemType")
+ResultType = TypeVar("ResultType")
+
+_EXHAUSTED = object()
+
+
+async def fan_out(
+    items: Iterable[ItemType],
+    job: Callable[[ItemType], Awaitable[ResultType]],
+    window: int,
+    ordered: bool = True,
+) -> AsyncIterator[ResultType]:
+    """
+    Runs the job for each item with at most `window` of them in flight and yields the results as they come: in the
+    order of the items, or in the order of completion if not `ordered`. Items are taken from the iterable only when
+    there is room in the window, so memory stays proportional to the window rather than the number of items. Closing
+    the iterator early cancels the jobs in flight and takes no more items.
+    """
+    items = iter(items)
+    in_flight: deque[asyncio.Future] = deque()
+
+    def submit() -> bool:
+        item = next(items, _EXHAUSTED)
+        if item is _EXHAUSTED:
+            return False
+        in_flight.append(asyncio.ensure_future(job(item)))
+        return True
+
+    try:
+        while len(in_flight) < window and submit():
+            pass
+
+        while in_flight:
+            if ordered:
+                result = await in_flight[0]
+                in_flight.popleft()
+            else:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                task = next(iter(done))
+                in_flight.remove(task)
+                result = task.result()
+            submit()
+            yield result
+    finally:
+        for task in in_flight:
+            task.cancel()
@@ -0,0 +1,77 @@
+import fnmatch
+import itertools
+import posixpath
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Optional
+
+
+@dataclass(frozen=True)
+class FindQuery:
+    """
+    Filters and pagination of dojo:find_data, following the `find` command the Cryton model runs. Data ids are treated
+    as file paths; directories are only found when asked for, as the parents of the data below the searched directory.
+    There are no links in the simulation.
+    """
+
+    directory: str
+    max_depth: Optional[int] = None
+    name_pattern: Optional[str] = None
+    file_type: Optional[str] = None
+    limit: Optional[int] = None
+    offset: int = 0
+
+    def matches(self, path: str) -> Iterator[str]:
+        """
+        Paths found for the given data id: the id itself, or its parent directories within the searched directory when
+        directories are searched for.
+        """
+        if not path.startswith(self.directory):
+            return
+
+        if self.file_type is None or self.file_type == "f":
+            if self._within_depth(path) and self._matches_name(path):
+                yield path
+        elif self.file_type == "d":
+            root = self.directory.rstrip("/")
+            parent = posixpath.dirname(path.rstrip("/"))
+            while len(parent) >= len(root) and parent.startswith(root):
+                if self._within_depth(parent) and self._matches_name(parent):
+                    yield parent
+                if parent == "/":
+                    break
+                parent = posixpath.dirname(parent)
+
+    def search(self, paths: Iterable[str]) -> list[str] | dict[str, Any]:
+        """
+        Lazily filters the paths and returns the requested page, or all of them without a limit. Directories shared
+        by several paths are found only once.
+        """
+        found = self._unique(found for path in paths for found in self.matches(path))
+        if self.limit is None:
+            return list(itertools.islice(found, self.offset, None))
+
+        page = list(itertools.islice(found, self.offset, self.offset + self.limit + 1))
+        more = len(page) > self.limit
+        return {
+            "items": page[: self.limit],
+            "offset": self.offset,
+            "next_offset": self.offset + self.limit if more else None,
+        }
+
+    def _within_depth(self, path: str) -> bool:
+        if self.max_depth is None:
+            return True
+        relative = path[len(self.directory) :].strip("/")
+        depth = relative.count("/") + 1 if relative else 0
+        return depth <= self.max_depth
+
+    def _matches_name(self, path: str) -> bool:
+        return self.name_pattern is None or fnmatch.fnmatchcase(posixpath.basename(path.rstrip("/")), self.name_pattern)
+
+    @staticmethod
+    def _unique(paths: Iterable[str]) -> Iterator[str]:
+        seen = set()
+        for path in paths:
+            if path not in seen:
+                seen.add(path)
+                yield path
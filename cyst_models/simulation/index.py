@@ -0,0 +1,69 @@
+import bisect
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from cyst.api.host.service import PassiveService
+from cyst.api.logic.data import Data
+
+if TYPE_CHECKING:
+    from cyst.api.environment.configuration import EnvironmentConfiguration
+
+
+class _ServiceIndex:
+    def __init__(self, data: list[Data]):
+        self.version = self.version_of(data)
+        entries = sorted((item for item in data if isinstance(item.id, str)), key=lambda item: item.id)
+        self.ids = [item.id for item in entries]
+        self.data = entries
+        # The first item with a given id wins, as with a scan of the list
+        self.by_id: dict[str, Data] = dict()
+        for item in data:
+            self.by_id.setdefault(item.id, item)
+
+    @staticmethod
+    def version_of(data: list[Data]) -> tuple:
+        """
+        Identifies the state of the data list in constant time: the list itself, its length and its last item.
+        """
+        return id(data), len(data), id(data[-1]) if data else None
+
+
+class PrivateDataIndex:
+    """
+    Per-service index of private data, which looks data up by id in constant time and answers prefix queries by
+    bisection of the sorted ids in O(log n + k). A service's index is built on its first query. The configuration API
+    hands out the data list itself and tells nobody about its changes, so each query compares the list, its length and
+    its last item with the indexed ones and rebuilds the index if they differ, which picks up added and removed data.
+    Whoever replaces an item in place or edits the id of one must `invalidate` the service.
+    """
+
+    def __init__(self, configuration: "EnvironmentConfiguration"):
+        self._configuration = configuration
+        # Services are keyed by identity and kept alive with their index, so that an id is not reused
+        self._indexes: dict[int, tuple[PassiveService, _ServiceIndex]] = dict()
+
+    def get(self, service: PassiveService, data_id: str) -> Optional[Data]:
+        return self._index(service).by_id.get(data_id)
+
+    def with_prefix(self, service: PassiveService, prefix: str) -> Iterator[Data]:
+        """
+        Lazily yields the service's private data whose id starts with the prefix, in the order of their ids.
+        """
+        index = self._index(service)
+        for position in range(bisect.bisect_left(index.ids, prefix), len(index.ids)):
+            if not index.ids[position].startswith(prefix):
+                break
+            yield index.data[position]
+
+    def invalidate(self, service: Optional[PassiveService] = None) -> None:
+        if service is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(id(service), None)
+
+    def _index(self, service: PassiveService) -> _ServiceIndex:
+        data = self._configuration.service.private_data(service)
+        entry = self._indexes.get(id(service))
+        if entry is None or entry[1].version != _ServiceIndex.version_of(data):
+            entry = (service, _ServiceIndex(data))
+            self._indexes[id(service)] = entry
+        return entry[1]
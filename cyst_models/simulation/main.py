@@ -1,9 +1,11 @@
-from typing import Tuple, Callable, Union, List, Coroutine, Any, Iterable, Dict
+from typing import Tuple, Callable, Union, List, Coroutine, Any, Iterable, Dict, Optional, AsyncIterator
+from collections import Counter
+from contextlib import aclosing
 from copy import deepcopy
 from cyst.api.logic.access import AccessLevel
 from cyst.api.logic.exploit import ExploitCategory
-from netaddr import IPNetwork
-import asyncio
+from netaddr import IPAddress, IPNetwork
+import itertools
 import random
 
 from cyst.api.environment.configuration import EnvironmentConfiguration
@@ -18,6 +20,7 @@ from cyst.api.environment.message import (
 from cyst.api.environment.messaging import EnvironmentMessaging
 from cyst.api.environment.policy import EnvironmentPolicy
 from cyst.api.environment.resources import EnvironmentResources
+from cyst.api.host.service import PassiveService
 from cyst.api.logic.action import (
     ActionDescription,
     ActionType,
@@ -34,8 +37,24 @@ from cyst.api.logic.composite_action import CompositeActionManager
 from cyst.api.network.node import Node
 from cyst.api.utils.duration import Duration, msecs
 
+from cyst_models.simulation.fanout import fan_out
+from cyst_models.simulation.find import FindQuery
+from cyst_models.simulation.index import PrivateDataIndex
+from cyst_models.simulation.scan import ScanEngine, ScanResult
+from cyst_models.simulation.topology import TopologyIndex
+from cyst_models.dojo.dispatch import build_dispatch_table, optional_parameter
+
 
 class SimulationModel(BehavioralModel):
+    # Resolve the hosts of scanned networks with the topology index and probe one host per network instead of messaging
+    # every address through the simulation. Hosts processing their own traffic are still probed one by one, but rules
+    # of the network's firewall that single out individual hosts are not honored.
+    approximate_scans: bool = False
+    # Scan messages in flight at once when messaging every address, and whether responses are collected in the order
+    # of the addresses or as they come
+    scan_window: int = 256
+    ordered_scans: bool = True
+
     def __init__(
         self,
         configuration: EnvironmentConfiguration,
@@ -53,8 +72,15 @@ class SimulationModel(BehavioralModel):
         self._messaging = messaging
         self._infrastructure = infrastructure
         self._cam = composite_action_manager
+        self._data_index = PrivateDataIndex(configuration)
+        self._topology = TopologyIndex(configuration)
+        self._scan_engine = ScanEngine(self._topology)
+
+        self._action_ids: List[str] = []
+        self._dispatch: Dict[str, Callable[..., Coroutine[Any, Any, Tuple[Duration, Response]]]] = dict()
+        self._handler_calls: Counter[str] = Counter()
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:direct:create_session",
                 ActionType.DIRECT,
@@ -67,7 +93,7 @@ class SimulationModel(BehavioralModel):
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:direct:update_routing",
                 ActionType.DIRECT,
@@ -80,7 +106,7 @@ class SimulationModel(BehavioralModel):
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:scan_network",
                 ActionType.COMPOSITE,
@@ -90,7 +116,12 @@ class SimulationModel(BehavioralModel):
                         ActionParameterType.NONE,
                         "to_network",
                         configuration.action.create_action_parameter_domain_any(),
-                    )
+                    ),
+                    ActionParameter(
+                        ActionParameterType.NONE,
+                        "host_limit",  # optional, stop once this many live hosts are found
+                        configuration.action.create_action_parameter_domain_any(),
+                    ),
                 ],
                 [
                     PlatformSpecification(PlatformType.SIMULATED_TIME, "CYST"),
@@ -99,7 +130,7 @@ class SimulationModel(BehavioralModel):
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:find_services",
                 ActionType.COMPOSITE,
@@ -123,7 +154,7 @@ class SimulationModel(BehavioralModel):
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:exploit_server",
                 ActionType.DIRECT,
@@ -136,7 +167,7 @@ class SimulationModel(BehavioralModel):
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:find_data",
                 ActionType.DIRECT,
@@ -147,6 +178,31 @@ class SimulationModel(BehavioralModel):
                         "directory",  # default is /
                         configuration.action.create_action_parameter_domain_any(),
                     ),
+                    ActionParameter(
+                        ActionParameterType.NONE,
+                        "max_depth",
+                        configuration.action.create_action_parameter_domain_any(),
+                    ),
+                    ActionParameter(
+                        ActionParameterType.NONE,
+                        "name_pattern",
+                        configuration.action.create_action_parameter_domain_any(),
+                    ),
+                    ActionParameter(
+                        ActionParameterType.NONE,
+                        "type",  # f or d
+                        configuration.action.create_action_parameter_domain_any(),
+                    ),
+                    ActionParameter(
+                        ActionParameterType.NONE,
+                        "limit",
+                        configuration.action.create_action_parameter_domain_any(),
+                    ),
+                    ActionParameter(
+                        ActionParameterType.NONE,
+                        "offset",
+                        configuration.action.create_action_parameter_domain_any(),
+                    ),
                 ],
                 [
                     PlatformSpecification(PlatformType.SIMULATED_TIME, "CYST"),
@@ -155,7 +211,7 @@ class SimulationModel(BehavioralModel):
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:execute_command",
                 ActionType.COMPOSITE,
@@ -174,7 +230,7 @@ class SimulationModel(BehavioralModel):
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:direct:exfiltrate_data",
                 ActionType.DIRECT,
@@ -193,7 +249,7 @@ class SimulationModel(BehavioralModel):
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:direct:scan_host",
                 ActionType.DIRECT,
@@ -206,7 +262,7 @@ class SimulationModel(BehavioralModel):
             )
         )
 
-        self._action_store.add(
+        self._register_action(
             ActionDescription(
                 "dojo:direct:execute_command",
                 ActionType.DIRECT,
@@ -225,27 +281,47 @@ class SimulationModel(BehavioralModel):
             )
         )
 
+        self._dispatch = build_dispatch_table(self, self._action_ids)
+
+    def _register_action(self, description: ActionDescription) -> None:
+        self._action_store.add(description)
+        self._action_ids.append(description.id)
+
+    @property
+    def handler_calls(self) -> Dict[str, int]:
+        return dict(self._handler_calls)
+
     async def action_flow(self, message: Request) -> Tuple[Duration, Response]:
-        action_name = "_".join(message.action.fragments)
-        fn: Callable[[Request], Coroutine[Any, Any, Tuple[Duration, Response]]] = getattr(
-            self, "process_" + action_name, self.process_default
-        )
-        return await fn(message)
+        action_id = message.action.id
+        self._handler_calls[action_id] += 1
+        return await self._dispatch.get(action_id, self.process_default)(message)
 
     async def action_effect(self, message: Request, node: Node) -> Tuple[Duration, Response]:
         if not message.action:
             raise ValueError("Action not provided")
 
-        action_name = "_".join(message.action.fragments)
-        fn: Callable[[Request, Node], Coroutine[Any, Any, Tuple[Duration, Response]]] = getattr(
-            self, "process_" + action_name, self.process_default
-        )
-        return await fn(message, node)
+        action_id = message.action.id
+        self._handler_calls[action_id] += 1
+        return await self._dispatch.get(action_id, self.process_default)(message, node)
 
     def action_components(self, message: Union[Request, Response]) -> List[Action]:
         return []
 
-    def process_default(self, message: Request, node: Node) -> Tuple[Duration, Response]:
+    def invalidate_data_index(self, service: Optional[PassiveService] = None) -> None:
+        """
+        Drops the index of private data of the service, or of all services. Added and removed private data are picked
+        up without it, call it after replacing items of the data in place or editing their ids.
+        """
+        self._data_index.invalidate(service)
+
+    def invalidate_topology(self) -> None:
+        """
+        Drops the index of node addresses and services used by approximate network scans. Changes made through the
+        configuration API drop it on their own, call this only after changing nodes bypassing it.
+        """
+        self._topology.invalidate()
+
+    async def process_default(self, message: Request, node: Optional[Node] = None) -> Tuple[Duration, Response]:
         print("Could not evaluate message. Tag in `dojo` namespace unknown. " + str(message))
         return msecs(0), self._messaging.create_response(
             message, Status(StatusOrigin.SYSTEM, StatusValue.ERROR), session=message.session
@@ -274,13 +350,22 @@ class SimulationModel(BehavioralModel):
 
     async def process_scan_network(self, message: Request) -> Tuple[Duration, Response]:
         to_network = message.action.parameters["to_network"].value
+        host_limit = optional_parameter(message, "host_limit", int)
+        if (scan := await self._bulk_scan(message, to_network)) is not None:
+            running_hosts = [str(address) for address, _ in itertools.islice(scan.hosts(), host_limit)]
+            return msecs(1), self._messaging.create_response(
+                message, Status(StatusOrigin.NETWORK, StatusValue.SUCCESS), running_hosts, message.session, message.auth
+            )
+
         targets = to_network.iter_hosts() if isinstance(to_network, IPNetwork) else [to_network]
 
-        results = await self._scan_multiple(targets, message)
         running_hosts = []
-        for response in results:
-            if response.status.value == StatusValue.SUCCESS:
-                running_hosts.append(str(response.src_ip))
+        async with aclosing(self._scan_multiple(targets, message)) as responses:
+            async for response in responses:
+                if response.status.value == StatusValue.SUCCESS:
+                    running_hosts.append(str(response.src_ip))
+                    if len(running_hosts) == host_limit:
+                        break
 
         return msecs(1), self._messaging.create_response(
             message, Status(StatusOrigin.NETWORK, StatusValue.SUCCESS), running_hosts, message.session, message.auth
@@ -288,25 +373,82 @@ class SimulationModel(BehavioralModel):
 
     async def process_find_services(self, message: Request) -> Tuple[Duration, Response]:
         to_network = message.action.parameters["to_network"].value
+        services = optional_parameter(message, "services", self._service_names)
+        if (scan := await self._bulk_scan(message, to_network, with_services=True, services=services)) is not None:
+            running_services = [
+                {"ip": str(address), "services": [{"name": name, "version": version} for name, version in found]}
+                for address, found in scan.hosts()
+            ]
+            return msecs(1), self._messaging.create_response(
+                message,
+                Status(StatusOrigin.NETWORK, StatusValue.SUCCESS),
+                running_services,
+                message.session,
+                message.auth,
+            )
+
         targets = to_network.iter_hosts() if isinstance(to_network, IPNetwork) else [to_network]
-        results = await self._scan_multiple(targets, message)
         running_services: List[Dict[str, str]] = []
-        for result in results:
-            if result.status.value == StatusValue.SUCCESS:
-                running_services.append({"ip": str(result.src_ip), "services": [{"name": service[0], "version": str(service[1])} for service in result.content]})
+        async with aclosing(self._scan_multiple(targets, message)) as results:
+            async for result in results:
+                if result.status.value != StatusValue.SUCCESS:
+                    continue
+                found = [service for service in result.content if services is None or service[0] in services]
+                if found or services is None:
+                    running_services.append(
+                        {
+                            "ip": str(result.src_ip),
+                            "services": [{"name": service[0], "version": str(service[1])} for service in found],
+                        }
+                    )
 
         return msecs(1), self._messaging.create_response(
             message, Status(StatusOrigin.NETWORK, StatusValue.SUCCESS), running_services, message.session, message.auth
         )
 
-    async def _scan_multiple(self, targets: Iterable, message: Request):
-        tasks = set()
-        for ip in targets:
+    async def _bulk_scan(
+        self,
+        message: Request,
+        to_network: Any,
+        with_services: bool = False,
+        services: Optional[set[str]] = None,
+    ) -> Optional[ScanResult]:
+        """
+        Scans the network with the scan engine. Returns None if the per-host path is to be used instead, i.e., unless
+        approximate scans are enabled, or for IPv6 targets.
+        """
+        if not self.approximate_scans:
+            return None
+        network = to_network if isinstance(to_network, IPNetwork) else IPNetwork(str(to_network))
+        if network.version != 4:
+            return None
+
+        async def probe(targets: List[IPAddress]) -> List[IPAddress]:
+            async with aclosing(self._scan_multiple(targets, message)) as results:
+                return [result.src_ip async for result in results if result.status.value == StatusValue.SUCCESS]
+
+        return await self._scan_engine.scan(network, probe, with_services, services)
+
+    @staticmethod
+    def _service_names(value: str | Iterable[str]) -> Optional[set[str]]:
+        """
+        Service filter of dojo:find_services, given as a list or comma-separated. An empty filter matches all services.
+        """
+        names = value.split(",") if isinstance(value, str) else value
+        return {name.strip() for name in names if name.strip()} or None
+
+    def _scan_multiple(self, targets: Iterable, message: Request) -> AsyncIterator[Response]:
+        """
+        Sends a scan to each target and streams the responses, with at most `scan_window` scans in flight. Closing the
+        iterator early stops the scan.
+        """
+
+        def scan(ip: Any) -> Coroutine[Any, Any, Response]:
             action = self._action_store.get("dojo:direct:scan_host")
             request = self._messaging.create_request(ip, "", action, original_request=message)
-            tasks.add(self._cam.call_action(request, 0))
+            return self._cam.call_action(request, 0)
 
-        return await asyncio.gather(*tasks)
+        return fan_out(targets, scan, self.scan_window, self.ordered_scans)
 
     async def process_exploit_server(self, message: Request, node: Node) -> Tuple[Duration, Response]:
         # This allows bruteforce without setting ssh exploit
@@ -352,7 +494,6 @@ class SimulationModel(BehavioralModel):
     async def process_find_data(self, message: Request, node: Node) -> Tuple[Duration, Response]:
         directory = message.action.parameters["directory"].value
 
-        result = []
         dst_service = ""
         if message.auth:
             dst_service = message.auth.services[0]
@@ -363,9 +504,16 @@ class SimulationModel(BehavioralModel):
                 message, Status(StatusOrigin.SERVICE, StatusValue.FAILURE), "Either session terminating at the service, or an auth is needed.", message.session
             )
 
-        for data in self._configuration.service.private_data(node.services[dst_service].passive_service):
-            if data.id.startswith(directory):
-                result.append(data.id)
+        query = FindQuery(
+            directory,
+            max_depth=optional_parameter(message, "max_depth", int),
+            name_pattern=optional_parameter(message, "name_pattern", str),
+            file_type=optional_parameter(message, "type", str),
+            limit=optional_parameter(message, "limit", int),
+            offset=optional_parameter(message, "offset", int) or 0,
+        )
+        private_data = self._data_index.with_prefix(node.services[dst_service].passive_service, directory)
+        result = query.search(data.id for data in private_data)
 
         return msecs(1), self._messaging.create_response(
             message, Status(StatusOrigin.SERVICE, StatusValue.SUCCESS), result, message.session
@@ -427,7 +575,6 @@ class SimulationModel(BehavioralModel):
 
         file = message.action.parameters["path"].value
 
-        result = []
         dst_service = ""
         if message.auth:
             dst_service = message.auth.services[0]
@@ -438,15 +585,15 @@ class SimulationModel(BehavioralModel):
                 message, Status(StatusOrigin.SERVICE, StatusValue.FAILURE), "Either session terminating at the service, or an auth is needed.", message.session
             )
 
-        for data in self._configuration.service.private_data(node.services[dst_service].passive_service):
-            if data.id == file:
-                return msecs(1), self._messaging.create_response(
-                    message,
-                    Status(StatusOrigin.SERVICE, StatusValue.SUCCESS),
-                    data.description,
-                    message.session,
-                    message.auth,
-                )
+        data = self._data_index.get(node.services[dst_service].passive_service, file)
+        if data is not None:
+            return msecs(1), self._messaging.create_response(
+                message,
+                Status(StatusOrigin.SERVICE, StatusValue.SUCCESS),
+                data.description,
+                message.session,
+                message.auth,
+            )
 
         return msecs(1), self._messaging.create_response(
             message,
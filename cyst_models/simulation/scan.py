@@ -0,0 +1,78 @@
+from array import array
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Collection, Iterable, Iterator, Optional
+
+from netaddr import IPAddress, IPNetwork
+
+from cyst_models.simulation.topology import HostAddress, TopologyIndex
+
+
+@dataclass
+class ScanResult:
+    # Addresses of the live hosts in ascending order
+    addresses: array = field(default_factory=lambda: array("I"))
+    # Services of the i-th host are services[offsets[i] : offsets[i + 1]], indexes into the catalog
+    offsets: array = field(default_factory=lambda: array("I", [0]))
+    services: array = field(default_factory=lambda: array("I"))
+    # Distinct (service name, version) pairs
+    catalog: list[tuple[str, str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    def hosts(self) -> Iterator[tuple[IPAddress, list[tuple[str, str]]]]:
+        for i, address in enumerate(self.addresses):
+            yield IPAddress(address, 4), [self.catalog[j] for j in self.services[self.offsets[i] : self.offsets[i + 1]]]
+
+
+class ScanEngine:
+    """
+    Scans a whole network in one pass: the hosts are resolved from the topology index rather than by messaging every
+    address, and reachability is established in bulk. Routing and firewalls between networks decide per network, so a
+    single probe through the simulation stands for all hosts of the network it reaches. Hosts processing their own
+    traffic are probed one by one.
+    """
+
+    def __init__(self, topology: TopologyIndex):
+        self._topology = topology
+
+    async def scan(
+        self,
+        network: IPNetwork,
+        probe: Callable[[list[IPAddress]], Awaitable[Iterable[IPAddress]]],
+        with_services: bool = False,
+        services: Optional[Collection[str]] = None,
+    ) -> ScanResult:
+        """
+        :param probe: Sends the scan to the given addresses through the simulation and returns the ones that responded.
+        :param services: Only hosts running one of these services are scanned and only these services are reported.
+            The hosts are taken from the service index, so the scan takes time proportional to them.
+        """
+        # Like IPNetwork.iter_hosts, the network and broadcast addresses are left out
+        first, last = network.first, network.last
+        if network.version == 4 and network.prefixlen < 31:
+            first, last = first + 1, last - 1
+
+        groups: dict[tuple[int, int] | int, list[HostAddress]] = dict()
+        for host in self._topology.hosts(first, last, services):
+            key = host.address if host.filtered else (host.network.first, host.network.prefixlen)
+            groups.setdefault(key, []).append(host)
+
+        representatives = [IPAddress(group[0].address, 4) for group in groups.values()]
+        responded = {int(address) for address in await probe(representatives)} if representatives else set()
+        live = sorted(
+            (host for group in groups.values() if group[0].address in responded for host in group),
+            key=lambda host: host.address,
+        )
+
+        result = ScanResult()
+        catalog: dict[tuple[str, str], int] = dict()
+        for host in live:
+            result.addresses.append(host.address)
+            if with_services:
+                for entry in self._topology.services(host.node_id, services):
+                    result.services.append(catalog.setdefault(entry, len(catalog)))
+            result.offsets.append(len(result.services))
+        result.catalog = list(catalog)
+        return result
+
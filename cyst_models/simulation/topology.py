@@ -0,0 +1,153 @@
+import bisect
+import functools
+import heapq
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Collection, Iterator, Optional
+
+from cyst.api.host.service import Service
+from cyst.api.network.node import Node
+from netaddr import IPNetwork
+
+# The configuration API is imported only where it is used, so that the index also imports with cyst-core releases
+# whose configuration API does not
+if TYPE_CHECKING:
+    from cyst.api.environment.configuration import EnvironmentConfiguration
+
+# Calls of the configuration API adding nodes or changing their addresses or services, by configuration area
+_CHANGING_CALLS = {
+    "node": ("add_interface", "set_interface", "add_service", "remove_service", "add_traffic_processor"),
+    "network": ("add_node", "add_connection"),
+}
+
+
+@dataclass(frozen=True)
+class HostAddress:
+    address: int
+    node_id: str
+    node: Node
+    # Network of the interface with the address
+    network: IPNetwork
+    # The node processes its own traffic, e.g., with a host firewall, so its reachability may differ from the network's
+    filtered: bool
+
+
+class _SortedHosts:
+    def __init__(self, hosts: list[HostAddress]):
+        hosts.sort(key=lambda host: host.address)
+        self.hosts = hosts
+        self.addresses = array("I", (host.address for host in hosts))
+
+    def between(self, first: int, last: int) -> Iterator[HostAddress]:
+        start = bisect.bisect_left(self.addresses, first)
+        end = bisect.bisect_right(self.addresses, last)
+        for position in range(start, end):
+            yield self.hosts[position]
+
+
+class TopologyIndex:
+    """
+    Simulation-wide index of the simulated nodes (not routers): their IPv4 addresses in a sorted array, the passive
+    services of each node, and the addresses of the nodes running each service. The hosts of a network, or of a network
+    running given services, are resolved in O(log n + k) instead of trying every address of it.
+
+    The index is built from the environment's configuration on first use and dropped whenever the configuration API
+    adds nodes or changes their interfaces or services, so queries never scan the nodes to find out whether it is
+    stale. Changes made to the nodes bypassing the configuration API need an explicit `invalidate`. Service versions
+    are read from the services when asked for, so version updates need no invalidation.
+    """
+
+    def __init__(self, configuration: "EnvironmentConfiguration"):
+        self._configuration = configuration
+        self._all: Optional[_SortedHosts] = None
+        self._by_address: dict[int, HostAddress] = dict()
+        self._node_services: dict[str, list[Service]] = dict()
+        self._service_hosts: dict[str, _SortedHosts] = dict()
+        for area, names in _CHANGING_CALLS.items():
+            target = getattr(configuration, area)
+            for name in names:
+                setattr(target, name, self._invalidating(getattr(target, name)))
+
+    def node(self, address: int) -> Optional[Node]:
+        self._ensure_built()
+        host = self._by_address.get(int(address))
+        return host.node if host else None
+
+    def services(self, node_id: str, names: Optional[Collection[str]] = None) -> list[tuple[str, str]]:
+        """
+        Names and versions of the node's passive services, optionally only of the given names.
+        """
+        self._ensure_built()
+        return [
+            (service.name, str(service.passive_service.version))
+            for service in self._node_services.get(node_id, [])
+            if names is None or service.name in names
+        ]
+
+    def nodes(self, service: str) -> list[Node]:
+        """
+        Nodes running the service.
+        """
+        self._ensure_built()
+        hosts = self._service_hosts.get(service)
+        return list({host.node_id: host.node for host in hosts.hosts}.values()) if hosts else []
+
+    def hosts(self, first: int, last: int, services: Optional[Collection[str]] = None) -> Iterator[HostAddress]:
+        """
+        Hosts with an address from first to last (inclusive), in the order of their addresses. If services are given,
+        only hosts running at least one of them.
+        """
+        self._ensure_built()
+        if services is None:
+            yield from self._all.between(first, last)
+            return
+
+        matches = [self._service_hosts[name].between(first, last) for name in services if name in self._service_hosts]
+        previous = None
+        for host in heapq.merge(*matches, key=lambda host: host.address):
+            if host.address != previous:
+                yield host
+            previous = host.address
+
+    def invalidate(self) -> None:
+        self._all = None
+
+    def _invalidating(self, call):
+        @functools.wraps(call)
+        def wrapper(*args, **kwargs):
+            try:
+                return call(*args, **kwargs)
+            finally:
+                self.invalidate()
+
+        return wrapper
+
+    def _ensure_built(self) -> None:
+        if self._all is None:
+            self._build()
+
+    def _build(self) -> None:
+        from cyst.api.configuration import NodeConfig
+
+        hosts = []
+        node_services: dict[str, list[Service]] = dict()
+        service_hosts: dict[str, list[HostAddress]] = dict()
+        for item in self._configuration.general.get_configuration():
+            if not isinstance(item, NodeConfig):
+                continue
+            node = self._configuration.general.get_object_by_id(item.id, Node)
+            node_hosts = [
+                HostAddress(int(interface.ip), item.id, node, interface.net, bool(item.traffic_processors))
+                for interface in node.interfaces
+                if interface.ip is not None and interface.ip.version == 4
+            ]
+            hosts.extend(node_hosts)
+
+            node_services[item.id] = [service for service in node.services.values() if service.passive_service]
+            for service in node_services[item.id]:
+                service_hosts.setdefault(service.name, []).extend(node_hosts)
+
+        self._all = _SortedHosts(hosts)
+        self._by_address = {host.address: host for host in hosts}
+        self._node_services = node_services
+        self._service_hosts = {name: _SortedHosts(addresses) for name, addresses in service_hosts.items()}
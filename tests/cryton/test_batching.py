@@ -0,0 +1,72 @@
+import asyncio
+
+from cyst_models.cryton.batching import CrytonBatcher
+
+
+def step(name: str) -> dict:
+    return {name: {"module": "command", "arguments": {"command": name}}}
+
+
+class Cryton:
+    """
+    Records the submitted plans and answers each step with a report naming it. Without support for merged plans, a
+    plan of several steps gets a single report, as a platform unaware of batching would return.
+    """
+
+    def __init__(self, merged_plans: bool = True):
+        self.merged_plans = merged_plans
+        self.plans: list[list[str]] = []
+
+    async def fetch_async(self, resource: str, data: dict) -> dict:
+        names = list(data["template"])
+        self.plans.append(names)
+        if len(names) == 1:
+            return {"output": names[0], "state": "FINISHED"}
+        if not self.merged_plans:
+            return {"output": "", "state": "FINISHED"}
+        return {name: {"output": name, "state": "FINISHED"} for name in names}
+
+
+def submit(batcher: CrytonBatcher, names: list[str], node_id: str = "attacker_node") -> list[dict]:
+    async def run():
+        return await asyncio.gather(
+            *(batcher.fetch_async("cryton://", {"template": step(name), "node_id": node_id}) for name in names)
+        )
+
+    return asyncio.run(run())
+
+
+def test_steps_for_the_same_node_are_merged_into_one_plan():
+    cryton = Cryton()
+    batcher = CrytonBatcher(cryton, window=0.01)
+
+    reports = submit(batcher, ["scan", "find", "services"])
+
+    assert cryton.plans == [["scan", "find", "services"]]
+    assert [report["output"] for report in reports] == ["scan", "find", "services"]
+    assert batcher.statistics.saved_round_trips == 2
+
+
+def test_unsupported_merged_plan_is_resubmitted_step_by_step():
+    cryton = Cryton(merged_plans=False)
+    batcher = CrytonBatcher(cryton, window=0.01)
+
+    reports = submit(batcher, ["scan", "find"])
+
+    assert cryton.plans[0] == ["scan", "find"]
+    assert sorted(cryton.plans[1:]) == [["find"], ["scan"]]
+    assert [report["output"] for report in reports] == ["scan", "find"]
+    assert batcher.statistics.fallbacks == 1
+
+    # Batching stays off for the node
+    submit(batcher, ["scan", "find"])
+    assert sorted(cryton.plans[3:]) == [["find"], ["scan"]]
+
+
+def test_steps_with_the_same_name_are_not_merged():
+    cryton = Cryton()
+    batcher = CrytonBatcher(cryton, window=0.01)
+
+    submit(batcher, ["scan", "scan"])
+
+    assert cryton.plans == [["scan"], ["scan"]]
@@ -0,0 +1,73 @@
+from cyst_models.cryton.cache import ResultCache
+
+SCAN, SERVICES = "dojo:scan_network", "dojo:find_services"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_the_ttl_of_their_action():
+    clock = Clock()
+    cache = ResultCache({SCAN: 10, SERVICES: 60}, clock=clock)
+    cache.put(SCAN, "attacker", "10.0.0.0/24", ("10.0.0.2",))
+    cache.put(SERVICES, "attacker", ("10.0.0.2", "22"), {"ssh": "9.6"})
+
+    clock.now = 9
+    assert cache.get(SCAN, "attacker", "10.0.0.0/24") == ("10.0.0.2",)
+
+    clock.now = 10
+    assert cache.get(SCAN, "attacker", "10.0.0.0/24") is None
+    assert cache.get(SERVICES, "attacker", ("10.0.0.2", "22")) == {"ssh": "9.6"}
+    assert cache.statistics.expirations == 1
+    assert len(cache) == 1
+
+
+def test_actions_without_a_ttl_are_not_cached():
+    cache = ResultCache({SCAN: 10})
+    cache.put("dojo:find_data", "attacker", "/etc", ["/etc/passwd"])
+
+    assert not cache.caches("dojo:find_data")
+    assert cache.get("dojo:find_data", "attacker", "/etc") is None
+    assert len(cache) == 0
+    assert cache.statistics.misses == 0
+
+
+def test_entries_are_kept_apart_by_caller_node():
+    cache = ResultCache({SCAN: 10})
+    cache.put(SCAN, "attacker", "10.0.0.0/24", ("10.0.0.2",))
+
+    assert cache.get(SCAN, "other", "10.0.0.0/24") is None
+    assert cache.statistics.misses == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache({SCAN: 10}, max_entries=2)
+    cache.put(SCAN, "attacker", "a", 1)
+    cache.put(SCAN, "attacker", "b", 2)
+    cache.get(SCAN, "attacker", "a")
+    cache.put(SCAN, "attacker", "c", 3)
+
+    assert cache.get(SCAN, "attacker", "b") is None
+    assert cache.get(SCAN, "attacker", "a") == 1
+    assert cache.get(SCAN, "attacker", "c") == 3
+    assert cache.statistics.evictions == 1
+    assert cache.statistics.hit_ratio == 3 / 4
+
+
+def test_invalidation_by_node_and_action():
+    cache = ResultCache({SCAN: 10, SERVICES: 10})
+    cache.put(SCAN, "attacker", "a", 1)
+    cache.put(SERVICES, "attacker", "a", 2)
+    cache.put(SCAN, "other", "a", 3)
+
+    assert cache.invalidate(node_id="attacker", action_id=SERVICES) == 1
+    assert cache.invalidate(node_id="attacker") == 1
+    assert cache.get(SCAN, "other", "a") == 3
+    assert cache.invalidate() == 1
+    assert len(cache) == 0
+    assert cache.statistics.invalidations == 3
@@ -0,0 +1,73 @@
+import subprocess
+
+from cyst_models.cryton.actions.execute_command import ExecuteCommand, batch_command, split_batch_output
+
+DELIMITER = "cyst-test"
+
+
+def run_batch(commands: list[str]) -> list[dict]:
+    script = batch_command(commands, DELIMITER)
+    output = subprocess.run(["sh", "-c", script], capture_output=True, text=True, timeout=10).stdout
+    return split_batch_output(output, commands, DELIMITER)
+
+
+def test_batch_reports_output_and_exit_code_per_command():
+    results = run_batch(["echo first", "false", "printf second"])
+
+    assert [result["output"] for result in results] == ["first\n", "", "second"]
+    assert [result["exit_code"] for result in results] == [0, 1, 0]
+
+
+def test_comment_does_not_swallow_the_rest_of_the_batch():
+    results = run_batch(["echo first # a comment", "echo second"])
+
+    assert [result["output"] for result in results] == ["first\n", "second\n"]
+    assert [result["exit_code"] for result in results] == [0, 0]
+
+
+def test_background_job_stays_within_its_group():
+    results = run_batch(["sleep 0 &", "echo second"])
+
+    assert results[0]["exit_code"] == 0
+    assert results[1] == {"command": "echo second", "output": "second\n", "exit_code": 0}
+
+
+def test_multi_line_command():
+    command = "for word in a b\ndo\n  echo $word\ndone"
+    results = run_batch([command, "echo second"])
+
+    assert results[0]["output"] == "a\nb\n"
+    assert [result["exit_code"] for result in results] == [0, 0]
+    assert results[1]["output"] == "second\n"
+
+
+def test_command_ending_the_shell_leaves_the_rest_without_exit_code():
+    results = run_batch(["echo first", "exit 3", "echo never"])
+
+    assert results[0]["exit_code"] == 0
+    assert [result["exit_code"] for result in results[1:]] == [None, None]
+
+
+def execute(action: ExecuteCommand) -> ExecuteCommand:
+    (step,) = action.template.values()
+    output = subprocess.run(["sh", "-c", step["arguments"]["command"]], capture_output=True, text=True, timeout=10)
+    action.report = {"output": output.stdout, "serialized_output": {}, "state": "FINISHED"}
+    return action
+
+
+def test_batch_action_reports_a_result_per_command():
+    action = execute(ExecuteCommand(1, "attacker.scripted_actor", None, 1, ["echo first", "exit 2"]))
+
+    assert action.commands == ["echo first", "exit 2"]
+    assert action.processed_output == [
+        {"command": "echo first", "output": "first\n", "exit_code": 0},
+        {"command": "exit 2", "output": "", "exit_code": None},
+    ]
+
+
+def test_single_command_is_run_as_it_is():
+    action = execute(ExecuteCommand(1, "attacker.scripted_actor", None, 1, "echo first; echo second"))
+
+    assert action.commands is None
+    assert action.template["execute-command-1"]["arguments"]["command"] == "echo first; echo second"
+    assert action.processed_output == "first\nsecond\n"
@@ -0,0 +1,54 @@
+import asyncio
+import base64
+import hashlib
+
+from cyst_models.cryton.actions import ExfiltrateChunk, FileDigest
+from cyst_models.cryton.exfiltration import ChunkedExfiltration
+
+CONTENT = b"root:x:0:0:root:/root:/bin/bash\n" * 10
+
+
+def execute(corrupted: set[int] = frozenset(), mangled: str = "bm90IGJhc2U2NA="):
+    """
+    Runs the digest and chunk steps against CONTENT, with the output of the given chunks replaced by the mangled one.
+    """
+
+    async def run(action) -> None:
+        if isinstance(action, FileDigest):
+            output = f"{len(CONTENT)}\n{hashlib.sha256(CONTENT).hexdigest()}  /etc/passwd\n"
+        elif action.index in corrupted:
+            output = mangled
+        else:
+            output = base64.b64encode(CONTENT[action.index * 64 : (action.index + 1) * 64]).decode()
+        action._report = {"output": output, "serialized_output": {}, "state": "FINISHED"}
+
+    return run
+
+
+def transfer(corrupted: set[int] = frozenset(), mangled: str = "bm90IGJhc2U2NA="):
+    exfiltration = ChunkedExfiltration(execute(corrupted, mangled), chunk_size=64, parallelism=2)
+    return asyncio.run(exfiltration.transfer(1, "attacker_node.service", None, 1, "/etc/passwd"))
+
+
+def test_chunks_are_reassembled_and_verified():
+    result = transfer()
+
+    assert result.content == CONTENT
+    assert result.progress.verified
+    assert result.progress.completed_chunks == result.progress.chunks == 5
+
+
+def test_corrupted_chunk_fails_the_transfer_with_its_offset():
+    result = transfer(corrupted={2})
+
+    assert result.content is None
+    assert isinstance(result.failed, ExfiltrateChunk)
+    assert "offset 128" in result.error
+
+
+def test_chunk_with_characters_outside_of_base64_fails_the_transfer():
+    # Decoded leniently, the stray characters would be skipped and the chunk would pass as "root:"
+    result = transfer(corrupted={1}, mangled="cm9v*dDo=")
+
+    assert result.content is None
+    assert "offset 64" in result.error
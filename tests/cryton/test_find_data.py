@@ -0,0 +1,46 @@
+import subprocess
+
+from cyst_models.cryton.actions.find_data import FindData, find_command
+
+
+def command(action: FindData) -> str:
+    (step,) = action.template.values()
+    return step["arguments"]["command"]
+
+
+def run(script: str, cwd: str) -> list[str]:
+    return subprocess.run(["sh", "-c", script], cwd=cwd, capture_output=True, text=True, timeout=10).stdout.split()
+
+
+def test_directory_is_quoted_with_and_without_filters():
+    directory = "/tmp/a b; touch pwned"
+
+    plain = FindData(1, "attacker.scripted_actor", None, 1, directory)
+    filtered = FindData(2, "attacker.scripted_actor", None, 1, directory, name_pattern="*.txt")
+
+    assert command(plain) == "find '/tmp/a b; touch pwned'"
+    assert command(filtered) == "find '/tmp/a b; touch pwned' -name '*.txt'"
+
+
+def test_filters_and_pages_in_the_shell(tmp_path):
+    for name in ("a.txt", "b.txt", "c.txt", "d.log"):
+        (tmp_path / name).touch()
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "e.txt").touch()
+
+    found = run(find_command(".", max_depth=1, name_pattern="*.txt", file_type="f") + " | sort", str(tmp_path))
+    assert found == ["./a.txt", "./b.txt", "./c.txt"]
+
+    # One path more than the limit tells whether there is another page
+    page = run(find_command(".", name_pattern="*.txt", limit=2, offset=1), str(tmp_path))
+    assert len(page) == 3
+
+
+def test_pages_of_found_paths():
+    action = FindData(1, "attacker.scripted_actor", None, 1, "/home", limit=2, offset=4)
+    action.report = {"output": "/home/a\n/home/b\n/home/c\n", "serialized_output": {}, "state": "FINISHED"}
+
+    assert action.processed_output == {"items": ["/home/a", "/home/b"], "offset": 4, "next_offset": 6}
+
+    action.report = {"output": "/home/a\n", "serialized_output": {}, "state": "FINISHED"}
+    assert action.processed_output == {"items": ["/home/a"], "offset": 4, "next_offset": None}
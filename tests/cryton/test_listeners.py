@@ -0,0 +1,56 @@
+import asyncio
+
+from cyst_models.cryton.listeners import ListenerPool, ListenerSpec
+
+SPEC = ListenerSpec("bind", 4444, "192.168.0.10")
+
+
+class External:
+    """
+    Cryton answering every step with the given report after the given delay, or raising the given error.
+    """
+
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+
+    async def fetch_async(self, resource: str, data: dict) -> dict:
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"output": "session 1 opened", "serialized_output": {"session_id": 1}, "state": "FINISHED"}
+
+
+def test_leased_handler_catches_the_session():
+    async def run():
+        pool = ListenerPool(External(), timeout=1)
+        handler = await pool.acquire("attacker_node.service", SPEC).result()
+        pool.close()
+        return handler
+
+    assert asyncio.run(run()).is_success()
+
+
+def test_handler_error_fails_the_action():
+    async def run():
+        pool = ListenerPool(External(error=OSError("Cryton is unreachable")))
+        handler = await pool.acquire("attacker_node.service", SPEC).result()
+        pool.close()
+        return handler
+
+    handler = asyncio.run(run())
+    assert not handler.is_success()
+    assert "Cryton is unreachable" in handler.output
+
+
+def test_lease_gives_up_after_the_timeout():
+    async def run():
+        pool = ListenerPool(External(delay=10), timeout=0.01)
+        handler = await pool.acquire("attacker_node.service", SPEC).result()
+        occupancy = pool.occupancy()
+        pool.close()
+        return handler, occupancy
+
+    handler, occupancy = asyncio.run(run())
+    assert not handler.is_success()
+    assert occupancy.leased == 0 and occupancy.recycled == 1
@@ -0,0 +1,66 @@
+import time
+
+from cyst_models.cryton import metrics
+from cyst_models.cryton.actions.action import Action
+from cyst_models.cryton.metrics import Histogram, Instrumentation
+
+
+def test_nested_measurements_of_a_phase_count_once():
+    instrumentation = Instrumentation()
+    with instrumentation.trace("dojo:find_services", 1):
+        with metrics.measure("parse"):
+            with metrics.measure("parse"):
+                time.sleep(0.02)
+
+    parse = instrumentation.events[0].phases["parse"]
+    assert 20 <= parse < 35
+
+
+def test_untraced_code_is_not_attributed():
+    instrumentation = Instrumentation()
+    with instrumentation.trace("dojo:scan_network", 1):
+        with metrics.untraced(), metrics.measure("parse"):
+            time.sleep(0.01)
+
+    assert instrumentation.events[0].phases["parse"] == 0.0
+
+
+def test_response_phase_takes_the_unattributed_rest():
+    instrumentation = Instrumentation()
+    with instrumentation.trace("dojo:scan_network", 1):
+        with metrics.measure("template"):
+            time.sleep(0.01)
+        time.sleep(0.01)
+
+    event = instrumentation.events[0]
+    assert sum(event.phases.values()) == event.total
+    assert event.phases["response"] >= 10
+    assert instrumentation.histograms("dojo:scan_network")["total"].count == 1
+
+
+def test_histogram_percentiles():
+    histogram = Histogram(resolution=1)
+    for value in (1, 2, 3, 100):
+        histogram.record(value)
+
+    assert histogram.count == 4 and histogram.maximum == 100
+    assert histogram.percentile(50) == 2
+    assert histogram.percentile(100) == 100
+
+
+def test_parsing_property_calling_another_is_measured_once():
+    class Scan(Action):
+        @property
+        def endpoints(self) -> list[int]:
+            time.sleep(0.02)
+            return [22]
+
+        @property
+        def processed_output(self) -> list[int]:
+            return self.endpoints
+
+    instrumentation = Instrumentation()
+    with instrumentation.trace("dojo:find_services", 1):
+        Scan(1, {}, "attacker_node.attacker", None).processed_output
+
+    assert 20 <= instrumentation.events[0].phases["parse"] < 35
@@ -0,0 +1,17 @@
+from cyst_models.cryton.parsing import HOST_FOUND, OPEN_PORT, PathParser, address_to_str, endpoint_port
+
+
+def test_lines_split_across_chunks_are_parsed_once_complete():
+    parser = PathParser()
+
+    assert parser.feed("/home/developer/\n/home/dev") == ["/home/developer/"]
+    assert parser.feed("eloper/.bashrc\n\n/etc/pass") == ["/home/developer/.bashrc"]
+    assert parser.finish() == ["/etc/pass"]
+
+
+def test_extractors_find_hosts_and_open_ports():
+    sweep = "[*] Performing ping sweep for IP range 10.0.1.0/24\n[+] \t10.0.1.2 host found\n[+] \t10.0.1.3 host found\n"
+    scan = "[+] 10.0.1.2:             - 10.0.1.2:22 - TCP OPEN\n[*] Scanned 1 of 1 hosts (100% complete)\n"
+
+    assert [address_to_str(address) for address in HOST_FOUND.addresses(sweep)] == ["10.0.1.2", "10.0.1.3"]
+    assert [endpoint_port(endpoint) for endpoint in OPEN_PORT.endpoints(scan)] == [22]
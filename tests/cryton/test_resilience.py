@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from cyst_models.cryton.actions.action import Action
+from cyst_models.cryton.resilience import (
+    CircuitOpenError,
+    DeadlineExceededError,
+    ExecutionError,
+    ResilientExecutor,
+    RetryPolicy,
+)
+
+REPORT = {"output": "done", "serialized_output": {}, "state": "FINISHED"}
+
+
+class ExternalResources:
+    """
+    Fetches Cryton reports, failing or hanging for the given number of first attempts.
+    """
+
+    def __init__(self, failures: int = 0, error: BaseException = ConnectionError("worker unreachable"), hang=False):
+        self.failures = failures
+        self.error = error
+        self.hang = hang
+        self.calls = 0
+
+    async def fetch_async(self, resource: str, data: dict) -> dict:
+        self.calls += 1
+        if self.calls <= self.failures:
+            if self.hang:
+                await asyncio.sleep(10)
+            raise self.error
+        return REPORT
+
+
+class Step(Action):
+    def __init__(self, resources: ExternalResources, node_id: str = "attacker"):
+        super().__init__(1, {"step": {"module": "command", "arguments": {}}}, f"{node_id}.actor", resources)
+
+
+class IdempotentStep(Step):
+    idempotent = True
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def executor(clock: Clock = None, **kwargs) -> ResilientExecutor:
+    async def sleep(_: float) -> None:
+        pass
+
+    policy = RetryPolicy(attempts=3, base_delay=0.01)
+    return ResilientExecutor(retry_policy=policy, clock=clock or Clock(), sleep=sleep, **kwargs)
+
+
+def test_connection_errors_of_idempotent_actions_are_retried():
+    resilient = executor()
+    resources = ExternalResources(failures=2)
+    action = IdempotentStep(resources)
+
+    asyncio.run(resilient.execute(action))
+
+    assert action.report == REPORT
+    assert resources.calls == 3
+    assert resilient.statistics.retries == 2
+
+
+def test_connection_errors_of_other_actions_are_not_retried():
+    resilient = executor()
+    resources = ExternalResources(failures=1)
+
+    with pytest.raises(ExecutionError):
+        asyncio.run(resilient.execute(Step(resources)))
+    assert resources.calls == 1
+    assert resilient.statistics.retries == 0
+
+
+def test_expired_deadlines_are_retried_only_for_idempotent_actions():
+    resilient = executor(default_deadline=0.01)
+    idempotent, other = ExternalResources(failures=1, hang=True), ExternalResources(failures=1, hang=True)
+
+    asyncio.run(resilient.execute(IdempotentStep(idempotent)))
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(resilient.execute(Step(other)))
+
+    assert (idempotent.calls, other.calls) == (2, 1)
+    assert resilient.statistics.timeouts == 2
+
+
+def test_errors_of_the_step_itself_are_not_retried():
+    resilient = executor()
+    resources = ExternalResources(failures=1, error=KeyError("template"))
+
+    with pytest.raises(KeyError):
+        asyncio.run(resilient.execute(IdempotentStep(resources)))
+    assert resources.calls == 1
+    assert not resilient.breaker("attacker").is_open
+
+
+def test_circuit_opens_after_failures_and_closes_after_a_successful_probe():
+    clock = Clock()
+    resilient = executor(clock, failure_threshold=2, reset_timeout=30)
+
+    with pytest.raises(ExecutionError):
+        asyncio.run(resilient.execute(Step(ExternalResources(failures=1))))
+    with pytest.raises(ExecutionError):
+        asyncio.run(resilient.execute(Step(ExternalResources(failures=1))))
+    assert resilient.breaker("attacker").is_open
+
+    rejected = ExternalResources()
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(resilient.execute(Step(rejected)))
+    assert rejected.calls == 0
+
+    # Other nodes have their own circuits
+    asyncio.run(resilient.execute(Step(ExternalResources(), node_id="other")))
+
+    clock.now = 30
+    asyncio.run(resilient.execute(Step(ExternalResources())))
+    assert not resilient.breaker("attacker").is_open
+    assert resilient.statistics.circuit_opens == 1
+    assert resilient.statistics.rejected == 1
+
+
+def test_failed_probe_opens_the_circuit_again():
+    clock = Clock()
+    resilient = executor(clock, failure_threshold=1, reset_timeout=30)
+    with pytest.raises(ExecutionError):
+        asyncio.run(resilient.execute(Step(ExternalResources(failures=1))))
+
+    clock.now = 30
+    with pytest.raises(ExecutionError):
+        asyncio.run(resilient.execute(Step(ExternalResources(failures=1))))
+
+    clock.now = 59
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(resilient.execute(Step(ExternalResources())))
+    assert resilient.statistics.circuit_opens == 2
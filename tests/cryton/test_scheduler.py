@@ -0,0 +1,107 @@
+import asyncio
+from types import SimpleNamespace
+
+from cyst_models.cryton.scheduler import FairScheduler
+
+
+def action(caller_id: str, priority: str = "default", node_id: str = "attacker") -> SimpleNamespace:
+    return SimpleNamespace(node_id=node_id, caller_id=caller_id, priority=priority)
+
+
+async def run_all(scheduler: FairScheduler, actions: list[SimpleNamespace]) -> list[str]:
+    """
+    Runs the actions with the first one holding its slot until all the others wait, and returns the order in which
+    the waiting actions got their slots.
+    """
+    order = []
+    release = asyncio.Event()
+
+    async def blocker() -> None:
+        async with scheduler.slot(action("blocker")):
+            await release.wait()
+
+    async def run(item: SimpleNamespace) -> None:
+        async with scheduler.slot(item):
+            order.append(item.caller_id)
+            await asyncio.sleep(0)
+
+    blocking = asyncio.ensure_future(blocker())
+    await asyncio.sleep(0)
+    runs = []
+    for item in actions:
+        runs.append(asyncio.ensure_future(run(item)))
+        await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(blocking, *runs)
+    return order
+
+
+def test_at_most_the_given_number_of_actions_run_per_worker():
+    scheduler = FairScheduler(2)
+    running, peak = 0, 0
+
+    async def run(item: SimpleNamespace) -> None:
+        nonlocal running, peak
+        async with scheduler.slot(item):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+
+    async def main():
+        await asyncio.gather(*(run(action(f"agent{i}")) for i in range(5)), run(action("pivot", node_id="pivot")))
+
+    asyncio.run(main())
+
+    assert peak == 3
+    assert scheduler.statistics.queued == 3
+    assert scheduler.statistics.max_queue_depth["attacker"] == 3
+    assert scheduler.statistics.running == {"attacker": 0, "pivot": 0}
+
+
+def test_higher_priority_classes_go_first():
+    scheduler = FairScheduler(1)
+    actions = [action("scan", "recon"), action("find", "default"), action("exploit", "exploitation")]
+
+    assert asyncio.run(run_all(scheduler, actions)) == ["exploit", "find", "scan"]
+
+
+def test_callers_take_turns_by_weight():
+    scheduler = FairScheduler(1, weights={"heavy": 2.0})
+    actions = [action("burst")] * 4 + [action("heavy")] * 4 + [action("light")] * 2
+
+    order = asyncio.run(run_all(scheduler, actions))
+
+    assert order[:4] == ["heavy", "burst", "heavy", "light"]
+    assert sorted(order) == sorted(item.caller_id for item in actions)
+
+
+def test_cancelled_waiter_does_not_take_a_slot():
+    scheduler = FairScheduler(1)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with scheduler.slot(action("first")):
+                await release.wait()
+
+        async def run(caller_id: str) -> str:
+            async with scheduler.slot(action(caller_id)):
+                return caller_id
+
+        holding = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        cancelled, waiting = asyncio.ensure_future(run("cancelled")), asyncio.ensure_future(run("waiting"))
+        await asyncio.sleep(0)
+        assert scheduler.statistics.queue_depth["attacker"] == 2
+
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert scheduler.statistics.queue_depth["attacker"] == 1
+        release.set()
+        await holding
+        return await waiting
+
+    assert asyncio.run(main()) == "waiting"
+    assert scheduler.statistics.running["attacker"] == 0
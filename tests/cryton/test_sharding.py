@@ -0,0 +1,61 @@
+from cyst_models.cryton.actions import FindServices
+from cyst_models.cryton.sharding import adaptive_threads, split_ports
+
+
+def scan_report(*endpoints: str, state: str = "FINISHED") -> dict:
+    output = "".join(f"[+] {endpoint.split(':')[0]}:             - {endpoint} - TCP OPEN\n" for endpoint in endpoints)
+    return {"output": output, "serialized_output": {}, "state": state}
+
+
+def shard(target: str, ports: str, number: int) -> FindServices:
+    return FindServices(1, "attacker.scripted_actor", None, target, ports, 4, number)
+
+
+def test_ports_are_split_into_chunks_in_their_order():
+    assert split_ports([22, 80, 443, 3306, 8080], 2) == [[22, 80], [443, 3306], [8080]]
+    assert split_ports([22], 2) == [[22]]
+    assert split_ports([], 2) == [[]]
+
+
+def test_threads_follow_the_number_of_probes_within_bounds():
+    assert adaptive_threads(1) == 1
+    assert adaptive_threads(100) == 4
+    assert adaptive_threads(100_000) == 32
+    assert adaptive_threads(100_000, maximum=8) == 8
+
+
+def test_shards_get_distinct_steps():
+    (first,) = shard("10.0.0.0/25", "22,80", 0).template
+    (second,) = shard("10.0.0.0/25", "22,80", 1).template
+
+    assert first != second
+
+
+def test_open_ports_of_shards_are_merged_by_host():
+    merged = shard("10.0.0.0/25", "22", 0)
+    merged.report = scan_report("10.0.0.2:22")
+    by_port = shard("10.0.0.0/25", "80", 1)
+    by_port.report = scan_report("10.0.0.2:80")
+    by_subnet = shard("10.0.0.128/25", "22", 2)
+    by_subnet.report = scan_report("10.0.0.130:22")
+
+    merged.merge_report(by_port)
+    merged.merge_report(by_subnet)
+
+    assert merged.is_success()
+    assert {host: sorted(ports) for host, ports in merged.processed_output.items()} == {
+        "10.0.0.2": [22, 80],
+        "10.0.0.130": [22],
+    }
+
+
+def test_failed_shard_fails_the_merged_scan():
+    merged = shard("10.0.0.0/25", "22", 0)
+    merged.report = scan_report("10.0.0.2:22")
+    failed = shard("10.0.0.128/25", "22", 1)
+    failed.report = scan_report(state="ERROR")
+
+    merged.merge_report(failed)
+
+    assert not merged.is_success()
+    assert merged.processed_output == {"10.0.0.2": [22]}
@@ -0,0 +1,78 @@
+import asyncio
+
+from cyst_models.cryton.actions import ExploitServer, ScanNetwork
+from cyst_models.cryton.single_flight import SingleFlight
+
+REPORT = {"output": "[+] \t10.0.0.2 host found\n", "serialized_output": {}, "state": "FINISHED"}
+
+
+class ExternalResources:
+    """
+    Returns REPORT for every step once released, counting the steps.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def fetch_async(self, resource: str, data: dict) -> dict:
+        self.calls += 1
+        await self.release.wait()
+        return REPORT
+
+
+def scan(message_id: int, resources: ExternalResources, target: str = "10.0.0.0/24") -> ScanNetwork:
+    return ScanNetwork(message_id, "attacker.scripted_actor", resources, target, 1)
+
+
+def test_identical_scans_share_one_execution():
+    async def run():
+        resources, single_flight = ExternalResources(), SingleFlight()
+        scans = [scan(1, resources), scan(2, resources), scan(3, resources, "10.0.1.0/24")]
+        executions = [asyncio.ensure_future(single_flight.execute(action)) for action in scans]
+        await asyncio.sleep(0)
+        assert single_flight.in_flight(scan(4, resources))
+
+        resources.release.set()
+        await asyncio.gather(*executions)
+        assert not single_flight.in_flight(scan(4, resources))
+        return resources, single_flight, scans
+
+    resources, single_flight, scans = asyncio.run(run())
+
+    assert resources.calls == 2
+    assert single_flight.statistics.executions == 2
+    assert single_flight.statistics.coalesced == 1
+    assert all(action.processed_output == ["10.0.0.2"] for action in scans)
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_execution():
+    async def run():
+        resources, single_flight = ExternalResources(), SingleFlight()
+        first, second = scan(1, resources), scan(2, resources)
+        cancelled = asyncio.ensure_future(single_flight.execute(first))
+        waiting = asyncio.ensure_future(single_flight.execute(second))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        resources.release.set()
+        await waiting
+        return second
+
+    assert asyncio.run(run()).is_success()
+
+
+def test_actions_with_side_effects_are_never_shared():
+    async def run():
+        resources, single_flight = ExternalResources(), SingleFlight()
+        resources.release.set()
+        exploits = [ExploitServer(i, "attacker.scripted_actor", resources, "10.0.0.2", "ssh") for i in (1, 2)]
+        assert not single_flight.in_flight(exploits[0])
+        await asyncio.gather(*(single_flight.execute(action) for action in exploits))
+        return resources, single_flight
+
+    resources, single_flight = asyncio.run(run())
+
+    assert resources.calls == 2
+    assert single_flight.statistics.executions == 0
@@ -0,0 +1,91 @@
+import asyncio
+
+from cyst_models.cryton.actions import Prerequisite
+from cyst_models.cryton.staging import StagingCache
+
+PYMYSQL = Prerequisite("pymysql", ("pip install pymysql",))
+IMPACKET = Prerequisite("impacket", ("pip install impacket",))
+
+
+class ExternalResources:
+    """
+    Installs prerequisites on the worker, failing the given ones. Installations wait until released.
+    """
+
+    def __init__(self, failing: frozenset[str] = frozenset()):
+        self.failing = failing
+        self.installed: list[tuple[str, list[str]]] = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def fetch_async(self, resource: str, data: dict) -> dict:
+        await self.release.wait()
+        (step,) = data["template"].values()
+        self.installed.append((data["node_id"], step["arguments"]["commands"]))
+        failed = any(name in command for command in step["arguments"]["commands"] for name in self.failing)
+        return {"output": "", "serialized_output": {}, "state": "ERROR" if failed else "FINISHED"}
+
+
+def test_prerequisites_are_installed_once_per_node():
+    resources = ExternalResources()
+    staging = StagingCache(resources)
+
+    async def run():
+        assert await staging.ensure("attacker.actor", [PYMYSQL, IMPACKET])
+        assert await staging.ensure("attacker.other_actor", [PYMYSQL])
+        assert await staging.ensure("pivot.actor", [PYMYSQL])
+
+    asyncio.run(run())
+
+    assert [node_id for node_id, _ in resources.installed] == ["attacker", "attacker", "pivot"]
+    assert staging.is_staged("attacker", IMPACKET)
+    assert (staging.statistics.installs, staging.statistics.skips) == (3, 1)
+
+
+def test_concurrent_requests_wait_for_the_installation_in_progress():
+    resources = ExternalResources()
+    resources.release.clear()
+    staging = StagingCache(resources)
+
+    async def run():
+        requests = [asyncio.ensure_future(staging.ensure("attacker.actor", [PYMYSQL])) for _ in range(3)]
+        await asyncio.sleep(0)
+        resources.release.set()
+        return await asyncio.gather(*requests)
+
+    assert asyncio.run(run()) == [True, True, True]
+    assert len(resources.installed) == 1
+
+
+def test_failed_installation_is_attempted_again():
+    resources = ExternalResources(failing=frozenset({"impacket"}))
+    staging = StagingCache(resources)
+
+    async def run():
+        assert not await staging.ensure("attacker.actor", [PYMYSQL, IMPACKET])
+        resources.failing = frozenset()
+        assert await staging.ensure("attacker.actor", [PYMYSQL, IMPACKET])
+
+    asyncio.run(run())
+
+    assert len(resources.installed) == 3
+    assert staging.statistics.failures == 1
+
+
+def test_invalidated_node_is_staged_again():
+    resources = ExternalResources()
+    staging = StagingCache(resources)
+
+    async def run():
+        await staging.ensure("attacker.actor", [PYMYSQL])
+        await staging.ensure("pivot.actor", [PYMYSQL])
+        staging.invalidate("attacker")
+        assert not staging.is_staged("attacker", PYMYSQL)
+        assert staging.is_staged("pivot", PYMYSQL)
+        await staging.ensure("attacker.actor", [PYMYSQL])
+        staging.invalidate()
+        assert not staging.is_staged("pivot", PYMYSQL)
+
+    asyncio.run(run())
+
+    assert [node_id for node_id, _ in resources.installed] == ["attacker", "pivot", "attacker"]
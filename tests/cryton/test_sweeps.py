@@ -0,0 +1,96 @@
+import asyncio
+
+from netaddr import IPNetwork
+
+from cyst_models.cryton.actions import ScanNetwork
+from cyst_models.cryton.parsing import address_to_str
+from cyst_models.cryton.sharding import as_completed, split_network
+
+
+def sweep_report(*hosts: str, state: str = "FINISHED", start: str = "2024-01-01T10:00:00") -> dict:
+    output = "".join(f"[+] \t{host} host found\n" for host in hosts)
+    return {
+        "output": output,
+        "serialized_output": {},
+        "state": state,
+        "start_time": start,
+        "finish_time": "2024-01-01T10:00:05",
+    }
+
+
+def test_networks_are_split_into_subranges_of_at_most_the_given_size():
+    assert split_network(IPNetwork("10.0.0.0/24"), 64) == [IPNetwork(f"10.0.0.{i}/26") for i in (0, 64, 128, 192)]
+    assert split_network(IPNetwork("10.0.0.0/24"), 100) == [IPNetwork(f"10.0.0.{i}/26") for i in (0, 64, 128, 192)]
+    assert split_network(IPNetwork("10.0.0.0/28"), 64) == [IPNetwork("10.0.0.0/28")]
+
+
+def test_results_come_in_the_order_of_completion_with_bounded_concurrency():
+    running, peak = 0, 0
+
+    def job(delay: float, result: str):
+        async def run() -> str:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(delay)
+            running -= 1
+            return result
+
+        return run
+
+    async def collect() -> list[str]:
+        return [result async for result in as_completed([job(0.03, "slow"), job(0.0, "fast"), job(0.01, "mid")], 2)]
+
+    assert asyncio.run(collect()) == ["fast", "mid", "slow"]
+    assert peak == 2
+
+
+def test_closing_early_cancels_the_pending_jobs():
+    cancelled = []
+
+    def job(delay: float):
+        async def run() -> float:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+
+        return run
+
+    async def first() -> float:
+        results = as_completed([job(0.0), job(1.0), job(2.0)], 3)
+        try:
+            async for result in results:
+                return result
+        finally:
+            await results.aclose()
+
+    assert asyncio.run(first()) == 0.0
+    assert sorted(cancelled) == [1.0, 2.0]
+
+
+def test_reports_of_subranges_are_merged_into_one_response():
+    first = ScanNetwork(1, "attacker.scripted_actor", None, "10.0.0.0/25", 1, 0)
+    second = ScanNetwork(1, "attacker.scripted_actor", None, "10.0.0.128/25", 1, 1)
+    first.report = sweep_report("10.0.0.2", start="2024-01-01T10:00:01")
+    second.report = sweep_report("10.0.0.130")
+
+    first.merge_report(second)
+
+    assert [address_to_str(address) for address in first.addresses] == ["10.0.0.130", "10.0.0.2"]
+    assert first.cryton_time == 5.0
+    assert first.is_success()
+
+
+def test_failed_subrange_fails_the_merged_response():
+    first = ScanNetwork(1, "attacker.scripted_actor", None, "10.0.0.0/25", 1, 0)
+    second = ScanNetwork(1, "attacker.scripted_actor", None, "10.0.0.128/25", 1, 1)
+    first.report = sweep_report("10.0.0.2")
+    second.report = sweep_report(state="ERROR")
+
+    first.merge_report(second)
+
+    assert not first.is_success()
+    assert first.processed_output == ["10.0.0.2"]
@@ -0,0 +1,68 @@
+import pytest
+
+from cyst_models.cryton.actions import ScanNetwork
+from cyst_models.cryton.actions.template import BoundTemplate, Format, Slot, StepTemplate, SESSION
+
+STEP = StepTemplate(
+    "stage-{message_id}",
+    {
+        "module": "command",
+        "arguments": {
+            "session_id": SESSION,
+            "command": Format("cd {directory}"),
+            "commands": Slot("commands", list),
+        },
+    },
+)
+
+
+def test_render_fills_the_slots():
+    template = STEP.bind(7, session=3, directory="/tmp", commands=["id"]).render()
+
+    assert template == {
+        "stage-7": {
+            "module": "command",
+            "arguments": {"session_id": 3, "command": "cd /tmp", "commands": ["id"]},
+        }
+    }
+
+
+def test_rendered_templates_do_not_share_mutable_slot_values():
+    bound: BoundTemplate = STEP.bind(7, session=3, directory="/tmp", commands=["id"])
+    first = bound.render()
+    first["stage-7"]["arguments"]["commands"].append("whoami")
+
+    assert bound.render()["stage-7"]["arguments"]["commands"] == ["id"]
+    assert bound.values["commands"] == ["id"]
+
+
+def test_session_references_and_step_names():
+    by_id = STEP.bind(7, session=3, directory="/tmp", commands=[])
+    by_step = STEP.bind(8, session="exploit-step", directory="/tmp", commands=[])
+
+    assert by_id.step_name == "stage-7"
+    assert by_id.render()["stage-7"]["arguments"]["session_id"] == 3
+    assert by_step.render()["stage-8"]["arguments"]["session_id"] == "{{ exploit-step }}"
+
+
+def test_missing_slot_values_are_rejected():
+    with pytest.raises(RuntimeError, match="commands"):
+        STEP.bind(7, session=3, directory="/tmp")
+
+
+def test_skeleton_is_immutable_and_shared_leaves_are_not_copied():
+    with pytest.raises(TypeError):
+        STEP.skeleton["module"] = "metasploit"
+
+    first, second = (STEP.bind(i, session=3, directory="/tmp", commands=[]).render() for i in (1, 2))
+    assert first["stage-1"]["arguments"] is not second["stage-2"]["arguments"]
+    assert first["stage-1"]["module"] is second["stage-2"]["module"]
+
+
+def test_coalescing_key_ignores_the_message():
+    first = ScanNetwork(1, "attacker.scripted_actor", None, "10.0.0.0/24", 1)
+    second = ScanNetwork(2, "attacker.other_actor", None, "10.0.0.0/24", 1)
+    other = ScanNetwork(3, "attacker.scripted_actor", None, "10.0.1.0/24", 1)
+
+    assert first.template != second.template
+    assert first.coalescing_key == second.coalescing_key != other.coalescing_key
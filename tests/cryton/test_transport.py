@@ -0,0 +1,22 @@
+import subprocess
+
+import pytest
+
+from cyst_models.cryton.transport import CompressedTransport
+
+
+@pytest.mark.parametrize(
+    "command, expected",
+    [
+        ("echo first ; echo second >&2", "first\nsecond\n"),
+        ("echo first # a comment", "first\n"),
+        ("sleep 0 &", ""),
+        ("for word in a b\ndo\n  echo $word\ndone", "a\nb\n"),
+    ],
+)
+def test_wrapped_command_round_trips(command, expected):
+    transport = CompressedTransport(use_zstd=False)
+    output = subprocess.run(["sh", "-c", transport.wrap(command)], capture_output=True, text=True, timeout=10).stdout
+
+    assert transport.unwrap(output) == expected
+    assert transport.statistics.fallbacks == 0
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+import pytest
+
+from cyst_models.dojo.dispatch import build_dispatch_table, optional_parameter
+
+
+class Model:
+    async def process_scan_network(self, message):
+        pass
+
+    async def process_direct_exfiltrate_data(self, message, node):
+        pass
+
+
+def message(**parameters) -> SimpleNamespace:
+    return SimpleNamespace(
+        action=SimpleNamespace(parameters={name: SimpleNamespace(value=value) for name, value in parameters.items()})
+    )
+
+
+def test_actions_are_dispatched_to_their_handlers():
+    model = Model()
+    dispatch = build_dispatch_table(model, ["dojo:scan_network", "dojo:direct:exfiltrate_data"])
+
+    assert dispatch == {
+        "dojo:scan_network": model.process_scan_network,
+        "dojo:direct:exfiltrate_data": model.process_direct_exfiltrate_data,
+    }
+
+
+def test_action_without_handler_is_rejected():
+    with pytest.raises(RuntimeError, match="process_find_data"):
+        build_dispatch_table(Model(), ["dojo:find_data"])
+
+
+def test_missing_and_empty_parameters_are_none():
+    assert optional_parameter(message(limit="10"), "limit", int) == 10
+    assert optional_parameter(message(limit=""), "limit", int) is None
+    assert optional_parameter(message(limit=None), "limit", int) is None
+    assert optional_parameter(message(), "limit", int) is None
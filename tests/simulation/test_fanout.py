@@ -0,0 +1,83 @@
+import asyncio
+import itertools
+from contextlib import aclosing
+
+from cyst_models.simulation.fanout import fan_out
+
+
+class Jobs:
+    """
+    Jobs sleeping for a delay given per item, recording the items taken, how many jobs run at once and which finish.
+    """
+
+    def __init__(self, delays: dict[int, float] = None):
+        self.delays = delays or dict()
+        self.running = 0
+        self.peak = 0
+        self.taken: list[int] = []
+        self.finished: list[int] = []
+
+    def items(self, items):
+        for item in items:
+            self.taken.append(item)
+            yield item
+
+    async def __call__(self, item: int) -> int:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(item, 0))
+        finally:
+            self.running -= 1
+        self.finished.append(item)
+        return item
+
+
+async def collect(results) -> list[int]:
+    return [result async for result in results]
+
+
+def test_results_in_the_order_of_the_items():
+    jobs = Jobs({0: 0.02, 1: 0.01})
+
+    assert asyncio.run(collect(fan_out(jobs.items(range(5)), jobs, 2))) == [0, 1, 2, 3, 4]
+    assert jobs.peak == 2
+
+
+def test_results_in_the_order_of_completion():
+    jobs = Jobs({0: 0.03, 1: 0.01})
+
+    assert asyncio.run(collect(fan_out(range(3), jobs, 3, ordered=False))) == [2, 1, 0]
+
+
+def test_items_are_taken_only_when_there_is_room_in_the_window():
+    jobs = Jobs()
+
+    async def first_two() -> list[int]:
+        results = []
+        async with aclosing(fan_out(jobs.items(itertools.count()), jobs, 3)) as found:
+            async for result in found:
+                results.append(result)
+                if len(results) == 2:
+                    break
+        return results
+
+    assert asyncio.run(first_two()) == [0, 1]
+    # Each yielded result made room for one more item
+    assert jobs.taken == [0, 1, 2, 3, 4]
+    assert jobs.running == 0
+
+
+def test_closing_early_cancels_the_jobs_in_flight():
+    jobs = Jobs({1: 0.05, 2: 0.05, 3: 0.05})
+
+    async def first() -> int:
+        async with aclosing(fan_out(jobs.items(range(10)), jobs, 3, ordered=False)) as found:
+            async for result in found:
+                break
+        await asyncio.sleep(0.1)
+        return result
+
+    assert asyncio.run(first()) == 0
+    assert jobs.taken == [0, 1, 2, 3]
+    assert jobs.finished == [0]
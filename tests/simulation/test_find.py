@@ -0,0 +1,33 @@
+from cyst_models.simulation.find import FindQuery
+
+PATHS = ["/home/user/notes.txt", "/home/user/keys/id_rsa", "/home/admin/todo.txt", "/etc/passwd"]
+
+
+def test_files_filtered_by_directory_depth_and_name():
+    assert FindQuery("/home/").search(PATHS) == PATHS[:3]
+    assert FindQuery("/home/", max_depth=2).search(PATHS) == ["/home/user/notes.txt", "/home/admin/todo.txt"]
+    assert FindQuery("/home/", name_pattern="*.txt").search(PATHS) == ["/home/user/notes.txt", "/home/admin/todo.txt"]
+
+
+def test_directories_are_found_once_as_parents_of_the_data():
+    found = FindQuery("/home", file_type="d").search(PATHS)
+
+    assert found == ["/home/user", "/home", "/home/user/keys", "/home/admin"]
+    # The searched directory itself is at depth 0, like with `find`
+    assert FindQuery("/home", file_type="d", max_depth=1).search(PATHS) == ["/home/user", "/home", "/home/admin"]
+
+
+def test_links_are_never_found():
+    assert FindQuery("/", file_type="l").search(PATHS) == []
+
+
+def test_pages_follow_each_other():
+    first = FindQuery("/", limit=3).search(PATHS)
+    assert first == {"items": PATHS[:3], "offset": 0, "next_offset": 3}
+
+    second = FindQuery("/", limit=3, offset=first["next_offset"]).search(PATHS)
+    assert second == {"items": PATHS[3:], "offset": 3, "next_offset": None}
+
+
+def test_offset_without_limit_skips_paths():
+    assert FindQuery("/", offset=2).search(PATHS) == PATHS[2:]
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+from cyst_models.simulation.index import PrivateDataIndex
+
+
+class Configuration:
+    """
+    The part of the configuration API the index uses, handing out the data list itself like the real one.
+    """
+
+    def __init__(self, data: list):
+        self.data = data
+        self.service = SimpleNamespace(private_data=lambda _: self.data)
+
+
+def item(data_id: str) -> SimpleNamespace:
+    return SimpleNamespace(id=data_id, description=f"content of {data_id}", owner="user")
+
+
+def test_lookup_and_prefix_query():
+    passwd, shadow, notes = item("/etc/passwd"), item("/etc/shadow"), item("/home/user/notes.txt")
+    index = PrivateDataIndex(Configuration([notes, shadow, passwd]))
+    service = object()
+
+    assert index.get(service, "/etc/shadow") is shadow
+    assert index.get(service, "/etc/missing") is None
+    assert list(index.with_prefix(service, "/etc/")) == [passwd, shadow]
+
+
+def test_added_and_removed_data_are_picked_up():
+    passwd, shadow = item("/etc/passwd"), item("/etc/shadow")
+    configuration = Configuration([passwd, shadow])
+    index = PrivateDataIndex(configuration)
+    service = object()
+    assert index.get(service, "/etc/shadow") is shadow
+
+    group = item("/etc/group")
+    configuration.data.append(group)
+    assert list(index.with_prefix(service, "/etc/")) == [group, passwd, shadow]
+
+    configuration.data.remove(passwd)
+    assert index.get(service, "/etc/passwd") is None
+
+    configuration.data = [passwd]
+    assert index.get(service, "/etc/shadow") is None
+    assert index.get(service, "/etc/passwd") is passwd
+
+
+def test_items_replaced_in_place_need_invalidation():
+    passwd, shadow = item("/etc/passwd"), item("/etc/shadow")
+    configuration = Configuration([passwd, shadow])
+    index = PrivateDataIndex(configuration)
+    service = object()
+    assert index.get(service, "/etc/passwd") is passwd
+
+    hosts = item("/etc/hosts")
+    configuration.data[0] = hosts
+    assert index.get(service, "/etc/passwd") is passwd
+
+    index.invalidate(service)
+    assert index.get(service, "/etc/passwd") is None
+    assert index.get(service, "/etc/hosts") is hosts
+
+
+def test_lookup_matches_a_scan_of_the_data():
+    first, duplicate, numbered = item("/etc/passwd"), item("/etc/passwd"), SimpleNamespace(id=42, description="")
+    data = [first, item("/etc/shadow"), duplicate, numbered]
+    index = PrivateDataIndex(Configuration(data))
+    service = object()
+
+    for data_id in ("/etc/passwd", "/etc/shadow", "/etc/hosts", 42):
+        assert index.get(service, data_id) is next((entry for entry in data if entry.id == data_id), None)
+    assert index.get(service, "/etc/passwd") is first
+    assert list(index.with_prefix(service, "/etc/p")) == [first, duplicate]
+
+
+def test_services_have_indexes_of_their_own():
+    passwd, notes = item("/etc/passwd"), item("/home/user/notes.txt")
+    ssh, web = object(), object()
+    data = {ssh: [passwd], web: [notes]}
+    configuration = Configuration([])
+    configuration.service.private_data = lambda service: data[service]
+    index = PrivateDataIndex(configuration)
+
+    assert index.get(ssh, "/etc/passwd") is passwd
+    assert index.get(web, "/etc/passwd") is None
+    assert index.get(web, "/home/user/notes.txt") is notes
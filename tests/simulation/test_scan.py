@@ -0,0 +1,68 @@
+import asyncio
+from typing import Collection, Optional
+
+from netaddr import IPAddress, IPNetwork
+
+from cyst_models.simulation.scan import ScanEngine
+from cyst_models.simulation.topology import HostAddress
+
+
+class Topology:
+    """
+    The part of the topology index the scan engine uses.
+    """
+
+    def __init__(self, hosts: list[HostAddress], services: dict[str, list[tuple[str, str]]]):
+        self._hosts = sorted(hosts, key=lambda host: host.address)
+        self._services = services
+
+    def hosts(self, first: int, last: int, services: Optional[Collection[str]] = None):
+        return (host for host in self._hosts if first <= host.address <= last)
+
+    def services(self, node_id: str, names: Optional[Collection[str]] = None):
+        return [entry for entry in self._services.get(node_id, []) if names is None or entry[0] in names]
+
+
+def host(address: str, node_id: str, network: IPNetwork, filtered: bool = False) -> HostAddress:
+    return HostAddress(int(IPAddress(address)), node_id, None, network, filtered)
+
+
+def test_filtered_host_in_the_same_subnet_gets_its_own_result():
+    network = IPNetwork("192.168.0.0/24")
+    topology = Topology(
+        [
+            host("192.168.0.2", "web", network),
+            host("192.168.0.3", "db", network),
+            host("192.168.0.4", "guarded", network, filtered=True),
+        ],
+        {"web": [("http", "2.4")], "guarded": [("ssh", "8.0")]},
+    )
+    probed = []
+
+    async def probe(targets: list[IPAddress]) -> list[IPAddress]:
+        probed.append(sorted(str(target) for target in targets))
+        # The guarded host's own firewall drops the scan, the rest of the network responds
+        return [target for target in targets if str(target) != "192.168.0.4"]
+
+    result = asyncio.run(ScanEngine(topology).scan(network, probe, with_services=True))
+
+    assert probed == [["192.168.0.2", "192.168.0.4"]]
+    assert [(str(address), found) for address, found in result.hosts()] == [
+        ("192.168.0.2", [("http", "2.4")]),
+        ("192.168.0.3", []),
+    ]
+
+
+def test_filtered_host_responding_alone():
+    network = IPNetwork("10.0.0.0/24")
+    topology = Topology(
+        [host("10.0.0.5", "open", network), host("10.0.0.6", "guarded", network, filtered=True)],
+        {},
+    )
+
+    async def probe(targets: list[IPAddress]) -> list[IPAddress]:
+        return [target for target in targets if str(target) == "10.0.0.6"]
+
+    result = asyncio.run(ScanEngine(topology).scan(network, probe))
+
+    assert [str(address) for address, _ in result.hosts()] == ["10.0.0.6"]
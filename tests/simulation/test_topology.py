@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import pytest
+from netaddr import IPAddress, IPNetwork
+
+try:
+    from cyst.api.configuration import NodeConfig
+except Exception as e:  # cyst-core releases whose configuration API does not import with the installed pyserde
+    pytest.skip(f"cyst.api.configuration is unavailable: {e}", allow_module_level=True)
+
+from cyst_models.simulation.topology import TopologyIndex
+
+
+def interface(address: str) -> SimpleNamespace:
+    return SimpleNamespace(ip=IPAddress(address), net=IPNetwork(f"{address}/24"))
+
+
+def service(name: str, version: str) -> SimpleNamespace:
+    return SimpleNamespace(name=name, passive_service=SimpleNamespace(version=version))
+
+
+def node_config(node_id: str) -> NodeConfig:
+    return NodeConfig(
+        active_services=[], passive_services=[], traffic_processors=[], shell="", interfaces=[], id=node_id
+    )
+
+
+class Configuration:
+    """
+    The part of the configuration API the index uses, with the given nodes. Nodes are added and their interfaces and
+    services changed through it.
+    """
+
+    def __init__(self, nodes: dict[str, SimpleNamespace]):
+        configs = [node_config(node_id) for node_id in nodes]
+
+        def add_node(node_id: str, node: SimpleNamespace) -> None:
+            nodes[node_id] = node
+            configs.append(node_config(node_id))
+
+        self.general = SimpleNamespace(
+            get_configuration=lambda: configs,
+            get_object_by_id=lambda node_id, _: nodes[node_id],
+        )
+        self.node = SimpleNamespace(
+            add_interface=lambda node, iface, index=-1: node.interfaces.append(iface),
+            set_interface=lambda iface, ip="", mask="": setattr(iface, "ip", IPAddress(ip)),
+            add_service=lambda node, *services: node.services.update((s.name, s) for s in services),
+            remove_service=lambda node, *services: [node.services.pop(s.name) for s in services],
+            add_traffic_processor=lambda node, processor: None,
+        )
+        self.network = SimpleNamespace(add_node=add_node, add_connection=lambda *args: None)
+
+
+def addresses(index: TopologyIndex, services=None) -> list[str]:
+    first, last = int(IPAddress("10.0.0.0")), int(IPAddress("10.0.0.255"))
+    return [str(IPAddress(host.address)) for host in index.hosts(first, last, services)]
+
+
+def test_hosts_of_a_range_and_of_services():
+    web = SimpleNamespace(interfaces=[interface("10.0.0.3")], services={"http": service("http", "2.4")})
+    db = SimpleNamespace(interfaces=[interface("10.0.0.2")], services={"mysql": service("mysql", "8.0")})
+    index = TopologyIndex(Configuration({"web": web, "db": db}))
+
+    assert addresses(index) == ["10.0.0.2", "10.0.0.3"]
+    assert addresses(index, {"http"}) == ["10.0.0.3"]
+    assert index.services("db") == [("mysql", "8.0")]
+
+
+def test_configuration_changes_drop_the_index():
+    web = SimpleNamespace(interfaces=[interface("10.0.0.3")], services={"http": service("http", "2.4")})
+    configuration = Configuration({"web": web})
+    index = TopologyIndex(configuration)
+    assert addresses(index, {"http"}) == ["10.0.0.3"]
+
+    configuration.node.set_interface(web.interfaces[0], "10.0.0.7")
+    configuration.node.add_service(web, service("ssh", "9.6"))
+    db = SimpleNamespace(interfaces=[interface("10.0.0.2")], services={"ssh": service("ssh", "9.6")})
+    configuration.network.add_node("db", db)
+
+    assert addresses(index, {"ssh"}) == ["10.0.0.2", "10.0.0.7"]
+    assert addresses(index, {"http"}) == ["10.0.0.7"]
+    assert index.nodes("ssh") == [db, web]
+    assert index.services("web") == [("http", "2.4"), ("ssh", "9.6")]
+
+    configuration.node.remove_service(web, web.services["http"])
+    assert addresses(index, {"http"}) == []
+    assert index.services("web") == [("ssh", "9.6")]
+
+
+def test_changes_bypassing_the_configuration_need_invalidation():
+    web = SimpleNamespace(interfaces=[interface("10.0.0.3")], services={"http": service("http", "2.4")})
+    index = TopologyIndex(Configuration({"web": web}))
+    assert addresses(index) == ["10.0.0.3"]
+
+    web.interfaces[0] = interface("10.0.0.7")
+    assert addresses(index) == ["10.0.0.3"]
+
+    index.invalidate()
+    assert addresses(index) == ["10.0.0.7"]